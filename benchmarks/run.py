@@ -0,0 +1,155 @@
+""" Benchmark the moduml pipeline stages on a synthetic project.
+    Run from the repository root:
+        python -m benchmarks.run --files 5000 --output results.json
+        python -m benchmarks.run --files 5000 --compare results.json
+"""
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import datetime
+import io
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+from moduml import __version__, core, dot_writer, graph_viz_builder, network
+from moduml.module.imports import get_module_imports
+from moduml.module.index import ModuleIndex
+from moduml.module.registry import ModuleRegistry
+from moduml.options import RenderOptions
+
+from .synthetic import ProjectSpec, generate_project
+
+
+def _peak_rss_mb() -> float:
+    """ Peak RSS of the process so far, i.e. of all stages up to now, not of the last stage alone.
+    """
+    # ru_maxrss is in kilobytes on linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class StageTimer:
+    def __init__(self, n_files: int) -> None:
+        self.n_files = n_files
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def run(self, name: str, func: Callable):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        self.stages[name] = {
+            "seconds": round(seconds, 4),
+            "files_per_sec": round(self.n_files / seconds, 1) if seconds else None,
+            "peak_rss_so_far_mb": round(_peak_rss_mb(), 1),
+        }
+        return result
+
+
+def run_benchmark(root: Path, spec: ProjectSpec, jobs: int = 1, parser: str = "ast") -> Dict:
+    generate_project(root, spec)
+    filepaths: List[Path] = core.find_python_files(root)
+    timer = StageTimer(n_files=len(filepaths))
+
+    timer.run("discovery", lambda: core.find_python_files(root))
+
+    registry = ModuleRegistry(jobs=jobs, parser=parser)
+    timer.run("parsing", lambda: registry.load(filepaths))
+
+    def resolve_imports() -> None:
+        index = ModuleIndex(filepaths, project_path=root)
+        for filepath in filepaths:
+            get_module_imports(module_path=filepath, imports=registry.get(filepath).imports, project_path=root, index=index)
+    timer.run("import_resolution", resolve_imports)
+
+    # registry is warm, so this is graph assembly incl. import resolution
+    net = timer.run("graph_build", lambda: network.create(filepaths, project_path=root, registry=registry))
+    graph_size = {"nodes": net.number_of_nodes(), "edges": net.number_of_edges()}
+
+    compact = timer.run("compact", lambda: network.CompactGraph.from_graph(net))
+
+    args: Namespace = core.parse_args([str(root), "--show-interface", "--show-imports", "--excl", "mod1*.py"])
+    def filter_graph() -> None:
+        excl_nodes = core.exclude_nodes(project_path=root, net=compact, excl_pattern=args.excl, incl_pattern="pkg0/**/*.py")
+        compact.subgraph(n not in excl_nodes for n in range(len(compact)))
+    timer.run("filtering", filter_graph)
+
+    layout_kwargs = dict(network=compact, project_path=root, options=RenderOptions.from_args(args))
+    dot = timer.run("layout", lambda: graph_viz_builder.build_dot_layout(**layout_kwargs))
+    timer.run("dot_emission", lambda: dot.to_string())
+    timer.run("dot_stream", lambda: dot_writer.write_dot_layout(out=io.StringIO(), **layout_kwargs))
+
+    return {
+        "moduml_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "spec": spec.to_dict(),
+        "jobs": jobs,
+        "parser": parser,
+        "files": len(filepaths),
+        "graph": graph_size,
+        "stages": timer.stages,
+    }
+
+
+def print_results(results: Dict, baseline: Optional[Dict] = None) -> None:
+    print(f"moduml {results['moduml_version']}, {results['files']} files, "
+          f"{results['graph']['nodes']} nodes, {results['graph']['edges']} edges")
+    # the process-wide peak after each stage, a stage only shows its own peak if it raised it
+    header = f"{'stage':<20}{'seconds':>10}{'files/sec':>12}{'peak RSS so far MB':>20}"
+    if baseline:
+        header += f"{'baseline s':>12}{'change':>9}"
+    print(header)
+    for name,stage in results["stages"].items():
+        line = f"{name:<20}{stage['seconds']:>10.3f}{stage['files_per_sec'] or 0:>12.0f}{stage['peak_rss_so_far_mb']:>20.1f}"
+        base_stage = baseline["stages"].get(name) if baseline else None
+        if base_stage:
+            change = (stage["seconds"] - base_stage["seconds"]) / base_stage["seconds"] * 100 if base_stage["seconds"] else 0
+            line += f"{base_stage['seconds']:>12.3f}{change:>+8.0f}%"
+        print(line)
+
+
+def parse_args() -> Namespace:
+    spec = ProjectSpec()
+    parser = ArgumentParser(description="Benchmark moduml on a synthetic project.")
+    parser.add_argument("--files", type=int, default=spec.files, help="Number of modules.")
+    parser.add_argument("--depth", type=int, default=spec.depth, help="Levels of packages.")
+    parser.add_argument("--fanout", type=int, default=spec.fanout, help="Sub-packages per package.")
+    parser.add_argument("--imports", type=int, default=spec.imports, help="Import statements per module.")
+    parser.add_argument("--relative-ratio", type=float, default=spec.relative_ratio, help="Share of internal imports that are relative.")
+    parser.add_argument("--external-ratio", type=float, default=spec.external_ratio, help="Share of imports of external packages.")
+    parser.add_argument("--interface", type=int, default=spec.interface, help="Top-level definitions per module.")
+    parser.add_argument("--seed", type=int, default=spec.seed)
+    parser.add_argument("--jobs", type=int, default=1, help="Processes used for parsing.")
+    parser.add_argument("--parser", type=str, default="ast", choices=["ast", "astroid"])
+    parser.add_argument("--output", type=str, help="Write results as JSON to this file.")
+    parser.add_argument("--compare", type=str, help="JSON results of an earlier run, to compare against.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    spec = ProjectSpec(files=args.files,
+                       depth=args.depth,
+                       fanout=args.fanout,
+                       imports=args.imports,
+                       relative_ratio=args.relative_ratio,
+                       external_ratio=args.external_ratio,
+                       interface=args.interface,
+                       seed=args.seed
+                       )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = run_benchmark(Path(tmp_dir) / "project", spec, jobs=args.jobs, parser=args.parser)
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_results(results, baseline=baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+""" Generator of synthetic python projects, for benchmarking moduml on trees of a given size and shape.
+"""
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List
+import random
+
+
+EXTERNAL_PACKAGES = ["numpy", "pandas", "requests", "yaml", "torch", "boto3", "scipy", "attr"]
+
+
+@dataclass
+class ProjectSpec:
+    files:          int = 1000  # number of modules, excl. __init__.py files
+    depth:          int = 3     # levels of packages
+    fanout:         int = 4     # sub-packages per package
+    imports:        int = 8     # import statements per module
+    relative_ratio: float = 0.3 # share of internal imports that are relative
+    external_ratio: float = 0.2 # share of imports of external packages
+    interface:      int = 10    # top-level classes, functions and assignments per module
+    seed:           int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _package_dirs(root: Path, spec: ProjectSpec) -> List[Path]:
+    """ Tree of packages, breadth first: 'fanout' top-level packages with 'fanout' sub-packages each, 'depth' levels deep.
+    """
+    dirs = []
+    level = [root / f"pkg{i}" for i in range(spec.fanout)]
+    for _ in range(spec.depth):
+        dirs.extend(level)
+        level = [d / f"sub{i}" for d in level for i in range(spec.fanout)]
+    return dirs
+
+
+def _module_name(root: Path, filepath: Path) -> str:
+    return ".".join(filepath.relative_to(root).with_suffix("").parts)
+
+
+def _import_lines(rng: random.Random,
+                  filepath: Path,
+                  modules: List[Path],
+                  modules_by_dir: Dict[Path, List[Path]],
+                  root: Path,
+                  spec: ProjectSpec
+                  ) -> List[str]:
+    lines = []
+    for _ in range(spec.imports):
+        if rng.random() < spec.external_ratio:
+            ext = rng.choice(EXTERNAL_PACKAGES)
+            lines.append(rng.choice([f"import {ext}", f"from {ext} import util_{rng.randrange(5)}"]))
+            continue
+        target = rng.choice(modules)
+        if rng.random() < spec.relative_ratio:
+            siblings = [m for m in modules_by_dir[filepath.parent] if m != filepath]
+            if siblings:
+                lines.append(f"from .{rng.choice(siblings).stem} import func_0")
+                continue
+            if filepath.parent.parent != root:
+                lines.append(f"from .. import {filepath.parent.name}")
+                continue
+        dotted = _module_name(root, target)
+        package, _, name = dotted.rpartition(".")
+        lines.append(rng.choice([f"import {dotted}", f"from {package} import {name}", f"from {dotted} import func_0"]))
+    return lines
+
+
+def _interface_lines(rng: random.Random, spec: ProjectSpec) -> List[str]:
+    lines = []
+    for i in range(spec.interface):
+        kind = rng.randrange(3)
+        if kind == 0:
+            lines += [f"class Class{i}(Base{i % 3}):", "    pass", ""]
+        elif kind == 1:
+            if rng.random() < 0.3:
+                lines.append("@functools.lru_cache(maxsize=None)")
+            lines += [f"def func_{i}(a: int, b: str = '') -> Dict[str, int]:", "    return {}", ""]
+        else:
+            lines.append(f"CONST_{i} = {i}")
+    # func_0 is imported by other modules
+    lines += ["def func_0():", "    pass", ""]
+    return lines
+
+
+def generate_project(root: Path, spec: ProjectSpec) -> List[Path]:
+    """ Write a synthetic project to root, returns the paths of all written files.
+    """
+    rng = random.Random(spec.seed)
+    dirs = _package_dirs(root, spec)
+    modules = [dirs[i % len(dirs)] / f"mod{i}.py" for i in range(spec.files)]
+    init_files = [d / "__init__.py" for d in dirs]
+    # modules of each package, in the same order as modules
+    modules_by_dir: Dict[Path, List[Path]] = {}
+    for filepath in modules:
+        modules_by_dir.setdefault(filepath.parent, []).append(filepath)
+
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    for init_file in init_files:
+        init_file.write_text("")
+    for filepath in modules:
+        lines = ["import functools", "from typing import Dict", ""]
+        lines += _import_lines(rng, filepath, modules, modules_by_dir, root, spec)
+        lines += [""] + _interface_lines(rng, spec)
+        filepath.write_text("\n".join(lines) + "\n")
+    return init_files + modules
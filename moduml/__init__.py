@@ -1,2 +1,4 @@
-
 __version__ = "0.2.0"
+
+from .api import analyze, load_graph, render, save_graph
+from .options import RenderOptions
@@ -0,0 +1,50 @@
+""" Python API, for using moduml as a library. Ex:
+        graph = moduml.analyze("path/to/project")
+        dot = moduml.render(graph, moduml.RenderOptions(show_imports=True, highlight="numpy"))
+    The analysed graph isn't modified by render, so it can be kept and rendered many times, also concurrently.
+    A graph can be saved, and rendered elsewhere without the project's source tree:
+        moduml.save_graph(graph, "project.moduml.gz")
+        dot = moduml.render(moduml.load_graph("project.moduml.gz"))
+"""
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from . import discovery
+from . import network
+from .core import dot_string, prepare_view
+from .module.cache import AnalysisCache
+from .module.registry import ModuleRegistry
+from .network import CompactGraph, ProjectGraph, load_graph, save_graph
+from .options import RenderOptions
+
+
+def analyze(path: Union[str, Path],
+            jobs: int = 1,
+            parser: str = "ast",
+            cache_dir: Optional[Union[str, Path]] = None,
+            ignore: Iterable[str] = discovery.DEFAULT_IGNORES,
+            gitignore: bool = False
+            ) -> ProjectGraph:
+    """ Returns the graph of a python project, i.e. its files, directories and imports.
+        cache_dir: persistent analysis cache, no cache if not given
+        See the command line help (core.parse_args) for the other arguments.
+    """
+    project_path = Path(path)
+    if not project_path.is_dir():
+        raise NotADirectoryError(f"Must be a directory path: '{path}'")
+    cache = AnalysisCache(cache_dir=Path(cache_dir), project_path=project_path, parser=parser) if cache_dir else None
+    registry = ModuleRegistry(cache=cache, jobs=jobs, parser=parser)
+    filepaths = registry.load(discovery.iter_python_files(project_path, ignore=ignore, gitignore=gitignore))
+    graph = network.create(filepaths, project_path=project_path, registry=registry)
+    if cache:
+        cache.save()
+    return graph
+
+
+def render(graph: Union[ProjectGraph, CompactGraph], options: RenderOptions = RenderOptions()) -> str:
+    """ Returns the dot string of a graph made by analyze, or of its compact form (CompactGraph.from_graph),
+        which is faster to render many times.
+    """
+    project_path: Path = graph.graph["project_path"]
+    view = prepare_view(graph, project_path=project_path, options=options)
+    return dot_string(view, project_path=project_path, options=options)
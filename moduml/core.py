@@ -1,55 +1,127 @@
 
-from argparse import Namespace, ArgumentParser
+from argparse import Namespace, ArgumentParser, ArgumentTypeError
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, List, Optional, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+import cProfile
+import io
 import logging
+import os
+import sys
 
 import pydot
 import networkx as nx
 
+from . import discovery
+from . import dot_writer
+from . import gitdiff
 from . import graph_viz_builder
+from . import layout_engine
 from . import network
+from . import server
+from . import views
+from . import watch
+from .options import RenderOptions, parse_import_kinds
+from .profiling import Profiler
+from .module.cache import DEFAULT_CACHE_DIR, AnalysisCache, BlobCache
+from .module.imports import IMPORT_KINDS
+from .module.index import ModuleIndex
+from .module.registry import ModuleRegistry, PARSERS
+from .network import CompactGraph, ProjectGraph
 
 
 def exclude_nodes(project_path: Path,
-                  net: nx.DiGraph,
+                  net: CompactGraph,
                   excl_pattern: str, 
                   incl_pattern: str
-                  ) -> Set[Path]:
-    """ Returns the nodes/filepaths to be excluded, based on excl and incl patterns.
+                  ) -> Set[int]:
+    """ Returns the nodes (ids) to be excluded, based on excl and incl patterns.
         Excl: exclude any node that matches the excl pattern
         Incl: exclude any node that isnt in the incl pattern OR shares an edge with one.
     """
-    incl_filepaths = []
-    excl_filepaths = []
-    if incl_pattern:
-        incl_filepaths: List[Path] = list(project_path.rglob(incl_pattern))
-    if excl_pattern:
-        excl_filepaths: List[Path] = list(project_path.rglob(excl_pattern))
+    file_nodes: Set[int] = set(net.nodes_of_type("file"))
+    excl_nodes: Set[int] = set()
 
     # excl files
-    excl_nodes = [n for n,attr in net.nodes(data=True) if n in excl_filepaths and attr["_type"] == "file"]
+    if excl_pattern:
+        excl_filepaths: Set[int] = net.filter_paths(project_path=project_path, pattern=excl_pattern)
+        excl_nodes |= excl_filepaths & file_nodes
 
     # incl files
     if incl_pattern:
-        incl_edges = [(src,dst) for src,dst in net.edges() if src in incl_filepaths or dst in incl_filepaths]
-        incl_net = nx.DiGraph()
-        incl_net.add_edges_from(incl_edges)
-        excl_nodes += [n for n,attr in net.nodes(data=True) if n not in incl_net.nodes() and attr["_type"] == "file"]
+        incl_filepaths: Set[int] = net.filter_paths(project_path=project_path, pattern=incl_pattern)
+        incl_net_nodes: Set[int] = set()
+        for links in net.links.values():
+            for src,dst,_,_ in links:
+                if src in incl_filepaths or dst in incl_filepaths:
+                    incl_net_nodes.add(src)
+                    incl_net_nodes.add(dst)
+        excl_nodes |= file_nodes - incl_net_nodes
     
-    # Return nodes without duplicates (e.g. set)
-    return set(excl_nodes)
+    return excl_nodes
     
 
-def parse_args() -> Namespace:
-    parser = ArgumentParser()
-    parser.add_argument("path", type=str, help="Path to directory containing python project.")
+# Subcommands, given before the options, e.g. 'moduml diff HEAD~1 HEAD'. Without one, a project is rendered.
+COMMANDS = ["diff", "serve"]
+
+# Options of the render command that can't be used with diff, i.e. that need a working tree or a single analysis.
+DIFF_UNSUPPORTED_OPTIONS = ["gitignore", "save_graph", "load_graph", "watch", "importtime", "views"]
+
+
+def _import_kinds_arg(value: str) -> Tuple[str, ...]:
+    try:
+        return parse_import_kinds(value)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e))
+
+
+def argument_parser(command: Optional[str] = None, exit_on_error: bool = True) -> ArgumentParser:
+    """ The parser of the command line arguments.
+        command: one of COMMANDS, or None to render a project
+        exit_on_error: if False, invalid values raise argparse.ArgumentError instead of exiting
+    """
+    if command == "diff":
+        parser = ArgumentParser(prog="moduml diff", exit_on_error=exit_on_error, description="Draw the changes of the architecture between two git revisions: added, removed and changed files (interface), and added and removed imports.")
+        parser.add_argument("rev1", type=str, help="Old git revision, e.g. a commit, tag or branch.")
+        parser.add_argument("rev2", type=str, help="New git revision.")
+        parser.add_argument("path", type=str, nargs="?", default=".", help="Path to the project directory, in the git repository (default: current directory).")
+        # the changed imports are the point of a diff
+        parser.set_defaults(show_imports=True)
+    elif command == "serve":
+        parser = ArgumentParser(prog="moduml serve", exit_on_error=exit_on_error, description="Keep the analysed graphs of projects in memory, and render them on request over HTTP, e.g. GET /render?project=src&show-imports&format=svg. The options below are the defaults of the requests, see moduml/server.py.")
+        parser.add_argument("paths", type=str, nargs="+", help="Paths to the project directories to serve.")
+        parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to listen on (default: 127.0.0.1).")
+        parser.add_argument("--port", type=int, default=server.DEFAULT_PORT, help=f"TCP port to listen on (default: {server.DEFAULT_PORT}).")
+        parser.add_argument("--socket", type=str, help="Listen on this Unix socket instead of a TCP port.")
+        parser.add_argument("--refresh-interval", type=float, default=1.0, help="Seconds between checks for changed files of a project, done on its next request (default: 1.0). 0 checks on every request.")
+    else:
+        parser = ArgumentParser(exit_on_error=exit_on_error)
+        parser.add_argument("path", type=str, nargs="?", help="Path to directory containing python project. Not given with --load-graph.")
     #
     parser.add_argument("--dir-as", type=str, default="node", choices=["node", "cluster", "empty"], help="Draw a directory as 'node' (default), 'cluster' or 'empty' (not drawn).")
     parser.add_argument("--output-file", type=str, help="Replace dot string output with name of image file incl. extension (e.g. img.png). Supports file formats from GraphViz (e.g. png, svg).")
+    parser.add_argument("--engine", type=str, default="auto", choices=layout_engine.ENGINES, help=f"GraphViz layout program for the image file. 'auto' (default) uses 'dot', or 'sfdp' for graphs above {layout_engine.AUTO_MAX_NODES} nodes or {layout_engine.AUTO_MAX_EDGES} edges.")
+    parser.add_argument("--layout-timeout", type=float, default=None, help="Seconds to wait for GraphViz to write the image file. If it takes longer, it is stopped and the dot string is output instead.")
     parser.add_argument("--excl", type=str, help="Glob pattern for excluding files. Exclude files matching the pattern and any links to them.")
     parser.add_argument("--incl", type=str, help="Glob pattern for including files. Only files matching incl pattern AND files they import are shown.")
-    parser.add_argument("--highlight", type=str, default=None, help="Name of EXTERNAL package. Files that import it will be highlighted via color.")
+    parser.add_argument("--highlight", type=str, action="append", default=[], help="Name of EXTERNAL package, optionally with a color, e.g. 'numpy' or 'torch=red'. Files that import it will be highlighted via color. Can be repeated.")
+    parser.add_argument("--collapse-depth", type=int, default=None, help="Collapse the files in directories at this depth (or deeper) into a single node per directory, with import links merged and counted. The project directory is depth 0.")
+    parser.add_argument("--import-kinds", type=_import_kinds_arg, default=tuple(IMPORT_KINDS), help=f"Comma separated kinds of imports to keep: {', '.join(IMPORT_KINDS)} (default: all). Eager imports are at the top level of a module, guarded ones inside a try/if, typing ones inside 'if TYPE_CHECKING:' and deferred ones inside a function. Each kind is drawn with its own link style.")
+    parser.add_argument("--reduce-imports", action="store_true", help="Draw the transitive reduction of the import links between files, i.e. leave out a link to a file that is imported anyway via other links, that are at least as eager. Import cycles are kept.")
+    parser.add_argument("--bundle-imports", action="store_true", help="Bundle the import links between files in different directories into one link between the directories, labeled with the number of links. Requires --dir-as node.")
+    parser.add_argument("--granularity", type=str, default="file", choices=network.GRANULARITIES, help="Draw a node per 'file' (default), or per 'package', i.e. files collapsed into their directory.")
+    # analysis
+    parser.add_argument("--cache-dir", type=str, default=None, help=f"Directory for the persistent analysis cache (default: {DEFAULT_CACHE_DIR} in the project directory).")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the persistent analysis cache.")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of processes used for parsing files (default: 1). 0 uses one per CPU.")
+    parser.add_argument("--parser", type=str, default="ast", choices=PARSERS, help="Parser used to analyse files: 'ast' (default, fast) or 'astroid'.")
+    parser.add_argument("--ignore", type=str, action="append", default=[], help="Glob pattern (.gitignore syntax) of files and directories to skip when searching for python files. Can be repeated.")
+    parser.add_argument("--no-default-ignores", action="store_true", help=f"Don't skip the directories that are skipped by default: {', '.join(discovery.DEFAULT_IGNORES)}.")
+    parser.add_argument("--gitignore", action="store_true", help="Also skip files and directories ignored by the project's .gitignore files.")
+    parser.add_argument("--save-graph", type=str, help="Save the analysed graph to this file (JSON lines, gzipped if it ends with '.gz'), to render it later with --load-graph.")
+    parser.add_argument("--load-graph", type=str, help="Render a graph saved with --save-graph, instead of analysing a project directory.")
+    parser.add_argument("--watch", action="store_true", help="Keep running, and re-render whenever python files are added, modified or removed.")
+    parser.add_argument("--watch-interval", type=float, default=1.0, help="Seconds between checks for changed files in watch mode (default: 1.0).")
     # layout components
     parser.add_argument("--full-filepath", action="store_true", help="Show filenames with their full path. Default is to only show filename.")
     parser.add_argument("--show-interface", action="store_true", help="Show interface (var + function names) on file nodes.")
@@ -63,54 +135,379 @@ def parse_args() -> Namespace:
     parser.add_argument("--nodesep", type=float, default=0.5, help="Separation between nodes, i.e. horizontal spacing (when rankdir==top-bottom).")
     parser.add_argument("--ranksep", type=float, default=0.5, help="Separation between ranks (levels of nodes), i.e. vertical spacing (when rankdir==top-bottom).")
     parser.add_argument("--combine-links", action="store_true", help="Combine links when possible, to minimize the clutter. OBS: combines edges of different types.")
-    args = parser.parse_args()
+    # metrics
+    parser.add_argument("--import-metrics", action="store_true", help="Show the number of internal modules and external packages each file imports, directly or indirectly, when it is imported, i.e. following eager and guarded imports only.")
+    parser.add_argument("--importtime", type=str, help="Log file from 'python -X importtime'. Shows the measured cumulative import time of files (implies --import-metrics), and colors them by it.")
+    # output
+    parser.add_argument("--stream", action="store_true", help="Write the dot output while traversing the graph, bypassing pydot. Faster and uses less memory on large graphs.")
+    parser.add_argument("--views", type=str, help="TOML file with several views to render as image files, from a single analysis of the project. See moduml/views.py for the format.")
+    # profiling
+    parser.add_argument("--profile", type=str, nargs="?", const="table", choices=["table", "json"], help="Print wall time, CPU time and counts per stage to stderr, as a 'table' (default) or 'json'.")
+    parser.add_argument("--profile-output", type=str, help="Write cProfile stats of the run to this file, for inspection with pstats.")
+    return parser
+
+
+def parse_args(argv: Optional[List[str]] = None, command: Optional[str] = None) -> Namespace:
+    """ Parse command line arguments, from sys.argv if argv isn't given.
+        command: one of COMMANDS, or None to render a project
+    """
+    args = argument_parser(command).parse_args(argv)
     return args
 
 
-def main():
-    args = parse_args()
-    
-    # must be a directory path, for now
-    path = Path(args.path)
-    if not path.is_dir():
-        raise argparse.ArgumentTypeError("Must be a directory path")
-
-    # find all python files in path
-    filepaths: List[Path] = list(path.rglob("*.py"))
-
-    # convert filepaths to graph
-    net: nx.DiGraph = network.create(filepaths, project_path=path)
-
-    # check that external package for highlighting exists
-    if args.highlight:
-        ext_package = Path(args.highlight)
-        if ext_package in net.nodes() and net.nodes[ext_package]["_type"] == "ext_package": 
-            pass
-        else: 
-            args.highlight = None
-            logging.warning(f"Cannot find external package to highlight: '{ext_package}'")
-    
-    # exclude nodes based on glob pattern args
-    excl_nodes = exclude_nodes(project_path=path, net=net, excl_pattern=args.excl, incl_pattern=args.incl)
-    net.remove_nodes_from(excl_nodes)
+def find_python_files(project_path: Path, 
+                      ignore: List[str] = discovery.DEFAULT_IGNORES, 
+                      gitignore: bool = False
+                      ) -> List[Path]:
+    return list(discovery.iter_python_files(project_path, ignore=ignore, gitignore=gitignore))
+
+
+def ignore_patterns(args: Namespace) -> List[str]:
+    return args.ignore if args.no_default_ignores else discovery.DEFAULT_IGNORES + args.ignore
+
+
+def cache_dir(args: Namespace, project_path: Path) -> Path:
+    """ Directory of the persistent cache: --cache-dir, or else in the project directory.
+    """
+    return Path(args.cache_dir) if args.cache_dir else project_path / DEFAULT_CACHE_DIR
+
+
+def emitted_counts(net: CompactGraph, options: RenderOptions) -> Dict[str, int]:
+    """ Number of nodes and edges drawn for a (filtered) graph.
+    """
+    module_nodes: Set[int] = set(net.nodes_of_type("file")) | set(net.nodes_of_type("collapsed"))
+    dir_nodes: Set[int] = set(net.nodes_of_type("dir"))
+    n_nodes, n_edges = len(module_nodes), 0
+    if options.dir_as == "node":
+        n_nodes += len(dir_nodes)
+        n_edges += len(net.links["hierarchy"])
+    if options.show_imports:
+        # bundled import links are between directories
+        linked_nodes = module_nodes | dir_nodes
+        n_edges += sum(1 for src,dst,_,_ in net.links["import"] if src in linked_nodes and dst in linked_nodes)
+    return {"nodes emitted": n_nodes, "edges emitted": n_edges}
+
+
+def prepare_view(net: Union[nx.DiGraph, CompactGraph], 
+                 project_path: Path, 
+                 options: RenderOptions, 
+                 profiler: Optional[Profiler] = None
+                 ) -> CompactGraph:
+    """ Filter (and collapse) the graph based on options, returns the compact graph to draw.
+        The given graph isn't modified, each stage makes a new graph.
+    """
+    profiler = profiler or Profiler()
+    with profiler.stage("compact") as stage:
+        view = net if isinstance(net, CompactGraph) else CompactGraph.from_graph(net)
+        stage.counts["nodes"] = len(view)
+
+    import_kinds = parse_import_kinds(options.import_kinds)
+    if len(import_kinds) < len(IMPORT_KINDS):
+        # before metrics and highlighting, so they only count the kept imports
+        with profiler.stage("import kinds") as stage:
+            kept_kinds = {IMPORT_KINDS.index(k) for k in import_kinds}
+            n_links = len(view.links["import"])
+            # external packages that are no longer imported are dropped
+            imported = {dst for _,dst,kind,_ in view.links["import"] if kind in kept_kinds}
+            keep_nodes = (view.node_type(n) != "ext_package" or n in imported for n in range(len(view)))
+            view = view.subgraph(keep_nodes, keep_link=lambda link_type, link: link_type != "import" or link[2] in kept_kinds)
+            stage.counts["links excluded"] = n_links - len(view.links["import"])
+
+    if options.import_metrics:
+        # before filtering, so the closures include the excluded files
+        with profiler.stage("metrics"):
+            view = view.with_attributes(_closure=view.import_closures())
+
+    # check that external packages for highlighting exist
+    for package,_ in options.highlight_colors():
+        ext_package = view.node_id(Path(package))
+        if ext_package is None or view.node_type(ext_package) != "ext_package": 
+            logging.warning(f"Cannot find external package to highlight: '{package}'")
     
-    # Make args available to the graph_viz_builder module.
-    # Purpose: easy access to styling options, e.g. import-link-color.
-    # Otherwise all these options would have to be pipped all the way down.
-    graph_viz_builder.ARGS = args
+    # exclude nodes based on glob pattern options
+    with profiler.stage("filter") as stage:
+        excl_nodes = exclude_nodes(project_path=project_path, net=view, excl_pattern=options.excl, incl_pattern=options.incl)
+        if excl_nodes:
+            view = view.subgraph(n not in excl_nodes for n in range(len(view)))
+        stage.counts["nodes excluded"] = len(excl_nodes)
+
+    # contract files into their directories
+    if options.collapse_depth is not None or options.granularity != "file":
+        with profiler.stage("collapse") as stage:
+            view = network.collapse(view, project_path=project_path, depth=options.collapse_depth, granularity=options.granularity)
+            stage.counts["nodes"] = len(view)
+            stage.counts["edges"] = view.number_of_links()
+
+    # fewer import links to draw
+    if options.reduce_imports or options.bundle_imports:
+        with profiler.stage("reduce") as stage:
+            stage.counts["import links"] = len(view.links["import"])
+            if options.reduce_imports:
+                view = network.reduce_imports(view)
+            if options.bundle_imports:
+                if options.dir_as == "node":
+                    view = network.bundle_imports(view)
+                else:
+                    logging.warning(f"Cannot bundle import links with --dir-as {options.dir_as}, directories aren't drawn as nodes")
+            stage.counts["import links kept"] = len(view.links["import"])
+    return view
+
+
+def dot_string(net: CompactGraph, project_path: Path, options: RenderOptions) -> str:
+    """ The dot layout of a (prepared) graph.
+    """
+    if options.stream:
+        out = io.StringIO()
+        dot_writer.write_dot_layout(network=net, project_path=project_path, out=out, options=options)
+        return out.getvalue()
+    return graph_viz_builder.build_dot_layout(network=net, project_path=project_path, options=options).to_string()
+
+
+def render(net: Union[nx.DiGraph, CompactGraph], project_path: Path, args: Namespace, profiler: Optional[Profiler] = None) -> None:
+    """ Filter (and collapse) the graph based on args, and output it as a dot string or image file.
+    """
+    profiler = profiler or Profiler()
+    options = RenderOptions.from_args(args)
+    net = prepare_view(net, project_path=project_path, options=options, profiler=profiler)
+    layout_kwargs = dict(network=net, project_path=project_path, options=options)
+
+    counts = emitted_counts(net, options)
+    engine = layout_engine.select_engine(args.engine, n_nodes=counts["nodes emitted"], n_edges=counts["edges emitted"])
+
+    # stream dot statements to stdout or straight into GraphViz
+    if options.stream:
+        with profiler.stage("stream") as stage:
+            stage.counts.update(counts)
+            if args.output_file:
+                try:
+                    dot_writer.write_image(args.output_file, prog=engine, timeout=args.layout_timeout, **layout_kwargs)
+                    return
+                except layout_engine.LayoutTimeout as e:
+                    logging.warning(f"{e}, writing the dot string instead")
+            dot_writer.write_dot_layout(out=sys.stdout, **layout_kwargs)
+        return
 
     # create directory view
-    dot: pydot.Dot = graph_viz_builder.build_dot_layout(network=net, 
-                                                    project_path=path,
-                                                    dir_as=args.dir_as, 
-                                                    show_interface=args.show_interface,
-                                                    show_imports=args.show_imports
-                                                    )
+    with profiler.stage("layout") as stage:
+        dot: pydot.Dot = graph_viz_builder.build_dot_layout(**layout_kwargs)
+        stage.counts.update(counts)
     
-    # output as string or image file
+    # output as string or image file, the image is made by an external GraphViz process
     if args.output_file:
-        file_ext = args.output_file.split(".")[-1]
-        dot.write(args.output_file, prog="dot", format=file_ext)
-    else:
+        with profiler.stage("graphviz") as stage:
+            stage.counts["engine"] = engine
+            try:
+                layout_engine.render_image(lambda out: out.write(dot.to_string()), 
+                                           output_file=args.output_file, 
+                                           prog=engine, 
+                                           timeout=args.layout_timeout
+                                           )
+                return
+            except layout_engine.LayoutTimeout as e:
+                logging.warning(f"{e}, writing the dot string instead")
+    with profiler.stage("output"):
         print(dot.to_string())
 
+
+def render_views(net: Union[nx.DiGraph, CompactGraph], project_path: Path, views_args: List[Namespace], profiler: Profiler) -> None:
+    """ Render several views of the same graph to image files.
+        The dot layouts are built one after the other, each from the same compact graph,
+        while the GraphViz processes making the images run concurrently.
+    """
+    compact = net if isinstance(net, CompactGraph) else CompactGraph.from_graph(net)
+    jobs = []
+    for args in views_args:
+        options = RenderOptions.from_args(args)
+        view_net = prepare_view(compact, project_path=project_path, options=options, profiler=profiler)
+        counts = emitted_counts(view_net, options)
+        with profiler.stage("layout") as stage:
+            view_dot = dot_string(view_net, project_path=project_path, options=options)
+            for k,v in counts.items():
+                stage.counts[k] = stage.counts.get(k, 0) + v
+        engine = layout_engine.select_engine(args.engine, n_nodes=counts["nodes emitted"], n_edges=counts["edges emitted"])
+        jobs.append((args, engine, view_dot))
+
+    def render_image(args: Namespace, engine: str, view_dot: str) -> None:
+        try:
+            layout_engine.render_image(lambda out: out.write(view_dot), 
+                                       output_file=args.output_file, 
+                                       prog=engine, 
+                                       timeout=args.layout_timeout
+                                       )
+        except layout_engine.LayoutTimeout as e:
+            dot_file = Path(args.output_file).with_suffix(".dot")
+            dot_file.write_text(view_dot)
+            logging.warning(f"{e}, wrote the dot string to '{dot_file}' instead")
+
+    with profiler.stage("graphviz") as stage:
+        stage.counts["images"] = len(jobs)
+        # threads suffice, the work is done in the GraphViz processes
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [executor.submit(render_image, *job) for job in jobs]
+        failed = 0
+        for (args,_,_), future in zip(jobs, futures):
+            if future.exception():
+                failed += 1
+                logging.error(f"Failed to render '{args.output_file}': {future.exception()}")
+        if failed:
+            raise RuntimeError(f"{failed} of {len(jobs)} views failed to render")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv and argv[0] in COMMANDS else None
+    args = parse_args(argv[1:] if command else argv, command=command)
+    run_command = {"diff": run_diff, "serve": server.run}.get(command, run)
+    if not args.profile_output:
+        run_command(args)
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.runcall(run_command, args)
+    finally:
+        profile.dump_stats(args.profile_output)
+
+
+def analyse(path: Path, args: Namespace, profiler: Profiler) -> Tuple[ProjectGraph, ModuleRegistry]:
+    """ Returns the graph of the project in path, and the registry of its analysed files.
+    """
+    # find all python files in path, and parse them as they are found, reusing cached analysis of unchanged files
+    with profiler.stage("discover+parse") as stage:
+        cache = None if args.no_cache else AnalysisCache(cache_dir=cache_dir(args, project_path=path), project_path=path, parser=args.parser)
+        registry = ModuleRegistry(cache=cache, jobs=args.jobs, parser=args.parser)
+        files = discovery.iter_python_files(path, ignore=ignore_patterns(args), gitignore=args.gitignore)
+        filepaths: List[Path] = registry.load(files)
+        stage.counts["files"] = len(filepaths)
+        stage.counts["files parsed"] = registry.n_parsed
+        stage.counts["cache hits"] = registry.n_cached
+        if cache:
+            stage.counts["stat calls"] = cache.n_stat
+            stage.counts["hashed"] = cache.n_digest
+
+    # convert filepaths to graph, incl. resolving imports
+    with profiler.stage("graph") as stage:
+        index = ModuleIndex(filepaths, project_path=path)
+        net: nx.DiGraph = network.create(filepaths, project_path=path, registry=registry, index=index)
+        stage.counts["imports resolved"] = index.n_resolved
+        stage.counts["unique imports"] = index.n_unique
+        stage.counts["nodes"] = net.number_of_nodes()
+        stage.counts["edges"] = net.number_of_edges()
+
+    if cache:
+        with profiler.stage("cache save"):
+            cache.save()
+    return net, registry
+
+
+def run(args: Namespace) -> None:
+    # a directory path, or a saved graph
+    if args.load_graph:
+        if args.path:
+            raise ArgumentTypeError("Give either a directory path or --load-graph, not both")
+        if args.watch:
+            raise ArgumentTypeError("--watch needs the project directory, it can't be used with --load-graph")
+    elif not args.path or not Path(args.path).is_dir():
+        raise ArgumentTypeError("Must be a directory path")
+    if args.importtime:
+        # import times are shown with the import metrics, also in every view
+        args.import_metrics = True
+    # read the views before the analysis, so errors in the config show up right away
+    views_args: Optional[List[Namespace]] = views.load_views(Path(args.views), args) if args.views else None
+    profiler = Profiler()
+
+    net: Union[ProjectGraph, CompactGraph]
+    if args.load_graph:
+        with profiler.stage("load graph") as stage:
+            net = network.load_graph(Path(args.load_graph))
+            path: Path = net.graph["project_path"]
+            stage.counts["nodes"] = len(net)
+            stage.counts["edges"] = net.number_of_links()
+    else:
+        path = Path(args.path)
+        net, registry = analyse(path, args=args, profiler=profiler)
+
+    if args.importtime:
+        if isinstance(net, CompactGraph):
+            # import times are set on a networkx graph
+            net = net.to_networkx()
+        n_matched = network.add_import_times(net, project_path=path, log=Path(args.importtime).read_text())
+        if not n_matched:
+            logging.warning(f"No modules of the project found in importtime log: '{args.importtime}'")
+
+    if args.save_graph:
+        with profiler.stage("save graph"):
+            network.save_graph(net, Path(args.save_graph))
+
+    if not args.watch and not isinstance(net, CompactGraph):
+        # the networkx graph is only patched in watch mode, all views are drawn from the compact graph
+        net = CompactGraph.from_graph(net)
+
+    if views_args is not None:
+        render_views(net, project_path=path, views_args=views_args, profiler=profiler)
+        if args.profile:
+            print(profiler.to_json() if args.profile == "json" else profiler.to_table(), file=sys.stderr)
+        return
+
+    if not args.watch:
+        render(net, project_path=path, args=args, profiler=profiler)
+        if args.profile:
+            print(profiler.to_json() if args.profile == "json" else profiler.to_table(), file=sys.stderr)
+        return
+
+    # keep the full graph in memory, and render a filtered view of it after every change
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    def on_change(net: nx.DiGraph) -> None:
+        render(net, project_path=path, args=args)
+    on_change(net)
+    watch.watch(project_path=path,
+                net=net,
+                registry=registry,
+                find_files=lambda: find_python_files(path, ignore=ignore_patterns(args), gitignore=args.gitignore),
+                on_change=on_change,
+                interval=args.watch_interval
+                )
+
+
+def run_diff(args: Namespace) -> None:
+    """ Render the diff of the project between the git revisions args.rev1 and args.rev2.
+    """
+    for option in DIFF_UNSUPPORTED_OPTIONS:
+        if getattr(args, option):
+            raise ArgumentTypeError(f"--{option.replace('_', '-')} can't be used with diff")
+    path = Path(args.path)
+    if not path.is_dir():
+        raise ArgumentTypeError("Must be a directory path")
+    profiler = Profiler()
+
+    # the python files of each revision, by blob hash, read from git without a checkout
+    with profiler.stage("git") as stage:
+        old_blobs = gitdiff.python_blobs(path, args.rev1, ignore=ignore_patterns(args))
+        new_blobs = gitdiff.python_blobs(path, args.rev2, ignore=ignore_patterns(args))
+        blobs = {blob: filepath.as_posix() for filepath,blob in list(old_blobs.items()) + list(new_blobs.items())}
+        stage.counts["files"] = len(set(old_blobs) | set(new_blobs))
+        stage.counts["blobs"] = len(blobs)
+
+    # each blob is parsed once, unless it was parsed by an earlier diff
+    with profiler.stage("parse") as stage:
+        cache = None if args.no_cache else BlobCache(cache_dir=cache_dir(args, project_path=path), parser=args.parser)
+        n_cached = sum(1 for blob in blobs if cache and blob in cache)
+        summaries = gitdiff.summarize_blobs(path, blobs, parser=args.parser, cache=cache, jobs=args.jobs)
+        stage.counts["blobs parsed"] = len(blobs) - n_cached
+        stage.counts["cache hits"] = n_cached
+        if cache:
+            cache.save()
+
+    with profiler.stage("graph") as stage:
+        old = gitdiff.revision_graph(path, old_blobs, summaries)
+        new = gitdiff.revision_graph(path, new_blobs, summaries)
+        net = gitdiff.diff_graph(old, new, old_blobs=old_blobs, new_blobs=new_blobs)
+        changes = [attr["_change"] for _,attr in net.nodes(data=True) if "_change" in attr]
+        for change in ("added", "removed", "changed"):
+            stage.counts[f"files {change}"] = changes.count(change)
+        link_changes = list(net.graph["link_changes"].values())
+        stage.counts["imports added"] = link_changes.count("added")
+        stage.counts["imports removed"] = link_changes.count("removed")
+
+    render(net, project_path=path, args=args, profiler=profiler)
+    if args.profile:
+        print(profiler.to_json() if args.profile == "json" else profiler.to_table(), file=sys.stderr)
@@ -0,0 +1,140 @@
+""" Discovery of the python files in a project.
+    The tree is walked with os.scandir, and ignored directories are pruned before descending into them,
+    so e.g. virtual environments and node_modules are never listed.
+"""
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from fnmatch import fnmatchcase
+import os
+
+from .network.filtering import match_parts
+
+
+# Directories (and files) that never contain project sources.
+DEFAULT_IGNORES = [
+    ".git", ".hg", ".svn",
+    ".venv", "venv",
+    "node_modules",
+    "build", "dist",
+    "__pycache__",
+    "site-packages",
+    ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache",
+    "*.egg-info",
+    ".moduml_cache",
+]
+
+
+class IgnoreRule(NamedTuple):
+    """ A glob pattern, matched against a name or a path relative to 'base'.
+    """
+    base:     Tuple[str, ...] # parts of the directory the rule applies to, relative to the project
+    parts:    Tuple[str, ...] # pattern parts
+    anchored: bool            # match the path relative to base, instead of just the name
+    dir_only: bool
+    negated:  bool
+
+
+def parse_ignore_pattern(pattern: str, base: Tuple[str, ...] = ()) -> Optional[IgnoreRule]:
+    """ Parse a glob pattern, with the same rules as a line in a .gitignore file. Returns None for blank/comment lines.
+        Ex:
+            *.egg-info  --> any file or dir with that name
+            build/      --> any dir named build
+            /docs/conf.py, src/gen --> paths relative to base
+            !keep.py    --> negation, i.e. not ignored after all
+    """
+    pattern = pattern.rstrip("\n").rstrip("\r")
+    if not pattern.strip() or pattern.startswith("#"):
+        return None
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # a slash at the beginning or in the middle anchors the pattern, otherwise it is a single name
+    anchored = "/" in pattern
+    parts = tuple(p for p in pattern.lstrip("/").split("/") if p)
+    if not parts:
+        return None
+    return IgnoreRule(base=base, parts=parts, anchored=anchored, dir_only=dir_only, negated=negated)
+
+
+def is_ignored(rules: Iterable[IgnoreRule], rel_parts: Tuple[str, ...], is_dir: bool) -> bool:
+    """ Whether a path (relative to the project) is ignored. The last matching rule decides, as in git.
+    """
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if rel_parts[:len(rule.base)] != rule.base:
+                continue
+            parts = rel_parts[len(rule.base):]
+        else:
+            parts = rel_parts
+        if rule.anchored:
+            # '**' may also match the name itself, e.g. 'a/**' matches 'a/b.py'
+            matched = match_parts(parts, rule.parts, is_dir=True)
+        else:
+            matched = fnmatchcase(parts[-1], rule.parts[0])
+        if matched:
+            ignored = not rule.negated
+    return ignored
+
+
+def is_ignored_file(rules: Iterable[IgnoreRule], rel_parts: Tuple[str, ...]) -> bool:
+    """ Whether a file (relative to the project) is ignored, by itself or by one of its directories.
+        For files that are listed rather than found by walking the tree, e.g. files in a git revision.
+    """
+    rules = list(rules)
+    for i in range(1, len(rel_parts)):
+        if is_ignored(rules, rel_parts[:i], is_dir=True):
+            return True
+    return is_ignored(rules, rel_parts, is_dir=False)
+
+
+def _gitignore_rules(directory: Path, base: Tuple[str, ...]) -> List[IgnoreRule]:
+    try:
+        lines = (directory / ".gitignore").read_text(errors="replace").splitlines()
+    except OSError:
+        return []
+    rules = [parse_ignore_pattern(line, base=base) for line in lines]
+    return [r for r in rules if r]
+
+
+def iter_python_files(project_path: Path,
+                      ignore: Iterable[str] = DEFAULT_IGNORES,
+                      gitignore: bool = False
+                      ) -> Iterator[Path]:
+    """ Yield the python files of a project as they are found.
+        Same order as project_path.rglob("*.py"): the files of a directory, then its sub directories depth-first.
+        Ignored directories are not descended into. Symlinked directories are not followed.
+        ignore: glob patterns, see parse_ignore_pattern
+        gitignore: also ignore what the .gitignore files of the project (root and sub directories) ignore
+    """
+    rules = [r for r in (parse_ignore_pattern(p) for p in ignore) if r]
+    yield from _walk(project_path, (), rules, gitignore)
+
+
+def _walk(directory: Path, rel_parts: Tuple[str, ...], rules: List[IgnoreRule], gitignore: bool) -> Iterator[Path]:
+    if gitignore:
+        rules = rules + _gitignore_rules(directory, base=rel_parts)
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except PermissionError:
+        return
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        entry_parts = rel_parts + (entry.name,)
+        if is_dir:
+            if not is_ignored(rules, entry_parts, is_dir=True):
+                subdirs.append(entry)
+        elif entry.name.endswith(".py") and entry.is_file() and not is_ignored(rules, entry_parts, is_dir=False):
+            yield directory / entry.name
+    for entry in subdirs:
+        yield from _walk(directory / entry.name, rel_parts + (entry.name,), rules, gitignore)
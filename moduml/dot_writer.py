@@ -0,0 +1,165 @@
+""" Streaming alternative to building a pydot graph.
+    DOT statements are written to a file object while the graph is traversed,
+    with the same styling (and output) as GraphVizBuilder, but without creating pydot objects.
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO, Union
+import re
+
+import networkx as nx
+
+from .graph_viz_builder import GraphVizBuilder, add_layout
+from .layout_engine import render_image
+from .layout_types import collapsed_node_attributes, dir_node_attributes, file_node_attributes
+from .module.imports import IMPORT_KINDS
+from .network import CompactGraph
+from .options import RenderOptions
+
+
+DOT_KEYWORDS = {"graph", "subgraph", "digraph", "node", "edge", "strict"}
+
+_re_numeric = re.compile(r"^([0-9]+\.?[0-9]*|[0-9]*\.[0-9]+)$")
+_re_dbl_quoted = re.compile(r'^".*"$', re.S)
+_re_html = re.compile(r"^<.*>$", re.S)
+_re_id = re.compile(r"^[_a-zA-Z][a-zA-Z0-9_]*$")
+
+
+def _quoted(s: str) -> str:
+    return '"' + s.replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r") + '"'
+
+
+def _needs_quotes(s: str) -> Any:
+    """ True/False if it can be decided from the string alone whether it needs quotes, else None.
+        Same rules as pydot, so the output matches pydot's.
+    """
+    if s.isdigit():
+        return False
+    if s.isalnum():
+        return s[0].isdigit()
+    if any(ord(c) > 0x7F or ord(c) == 0 for c in s) and not _re_dbl_quoted.match(s) and not _re_html.match(s):
+        return True
+    if _re_numeric.match(s) or _re_dbl_quoted.match(s) or _re_html.match(s):
+        return False
+    return None
+
+
+def quote_id(s: str) -> str:
+    """ Quote a node/graph name, if needed.
+    """
+    if s.lower() in DOT_KEYWORDS:
+        return _quoted(s)
+    needs_quotes = _needs_quotes(s)
+    if needs_quotes is None:
+        needs_quotes = not _re_id.match(s)
+    return _quoted(s) if needs_quotes else s
+
+
+def quote_attr(value: Any) -> str:
+    """ Quote an attribute value, if needed.
+    """
+    if isinstance(value, bool):
+        return str(value).lower()
+    if not isinstance(value, str):
+        return str(value)
+    if value.lower() in DOT_KEYWORDS or _needs_quotes(value) is not False:
+        return _quoted(value)
+    return value
+
+
+def attr_list(attributes: Dict[str, Any]) -> str:
+    """ E.g. {"shape": "record", "label": "a.py"} --> ' [shape=record, label="a.py"]'
+    """
+    if not attributes:
+        return ""
+    return " [" + ", ".join(f"{k}={quote_attr(v)}" for k,v in attributes.items()) + "]"
+
+
+class DotStreamWriter(GraphVizBuilder):
+    """ Writes the layout of a graph as DOT statements to a file object, as it is traversed.
+        Call close() to end the graph.
+    """
+    def __init__(self,
+                 network: Union[nx.DiGraph, CompactGraph],
+                 project_path: Path,
+                 out: TextIO,
+                 options: RenderOptions = RenderOptions()
+                 ) -> None:
+        self.out = out
+        super().__init__(network=network, project_path=project_path, options=options)
+
+    def reset(self) -> None:
+        self.out.write("digraph G {\n")
+        for k,v in self.graph_attributes().items():
+            self.out.write(f"{k}={quote_attr(v)};\n")
+        self.out.write("node [fontname=Helvetica];\n")
+        # file node statements, when they are repeated inside clusters
+        self._file_statements: Dict[int, str] = {}
+
+    def close(self) -> None:
+        self.out.write("}\n")
+
+    def _write_node(self, n: int, attributes: Dict[str, Any]) -> str:
+        statement = f"{quote_id(self.network.names[n])}{attr_list(attributes)};\n"
+        self.out.write(statement)
+        return statement
+
+    def _write_edge(self, src: int, dst: int, attributes: Dict[str, Any]) -> None:
+        names = self.network.names
+        self.out.write(f"{quote_id(names[src])} -> {quote_id(names[dst])}{attr_list(attributes)};\n")
+
+    def add_file_nodes(self, with_interface: bool = False) -> None:
+        for n in self.file_nodes:
+            statement = self._write_node(n, file_node_attributes(**self.file_layout_kwargs(n, with_interface=with_interface)))
+            self._file_statements[n] = statement
+
+    def add_collapsed_nodes(self, with_interface: bool = False) -> None:
+        for n in self.collapsed_nodes:
+            statement = self._write_node(n, collapsed_node_attributes(**self.collapsed_layout_kwargs(n, with_interface=with_interface)))
+            self._file_statements[n] = statement
+
+    def add_dir_nodes(self) -> None:
+        for n in self.dir_nodes:
+            self._write_node(n, dir_node_attributes(node=self.network.path(n), is_package=(n in self.packages)))
+
+    def add_dir_clusters(self) -> None:
+        for n in self.dir_nodes:
+            self.out.write(f"subgraph {quote_id('cluster_' + self.network.names[n])} {{\n")
+            self.out.write(f"label={quote_attr(self.network.names[n])};\n")
+            self.out.write("color=gray;\n")
+            for dst in self.dir_children[n]:
+                if dst in self._file_statements:
+                    self.out.write(self._file_statements[dst])
+            self.out.write("}\n")
+
+    def add_hierarchy_links(self) -> None:
+        attributes = self.hierarchy_link_attributes()
+        for src,dst in self.hierarchy_links:
+            self._write_edge(src, dst, attributes)
+
+    def add_import_links(self) -> None:
+        for src,dst,kind,weight in self.internal_import_links:
+            self._write_edge(src, dst, self.import_link_attributes(weight=weight, kind=IMPORT_KINDS[kind], change=self.link_change(src, dst)))
+
+
+def write_dot_layout(network: Union[nx.DiGraph, CompactGraph],
+                     project_path: Path,
+                     out: TextIO,
+                     options: RenderOptions = RenderOptions()
+                     ) -> None:
+    """ Streaming version of graph_viz_builder.build_dot_layout, writes the DOT string to out.
+    """
+    writer = DotStreamWriter(network=network,
+                             project_path=project_path,
+                             out=out,
+                             options=options
+                             )
+    add_layout(writer, dir_as=options.dir_as, show_interface=options.show_interface, show_imports=options.show_imports)
+    writer.close()
+
+
+def write_image(output_file: str, prog: str = "dot", timeout: Optional[float] = None, **kwargs) -> None:
+    """ Stream the DOT layout straight into a GraphViz process, that writes the image file.
+        The image format is given by the file extension. kwargs: see write_dot_layout
+        Raises layout_engine.LayoutTimeout if GraphViz doesn't finish within timeout seconds.
+    """
+    render_image(lambda out: write_dot_layout(out=out, **kwargs), output_file=output_file, prog=prog, timeout=timeout)
@@ -0,0 +1,193 @@
+""" Architecture diff of a project between two git revisions: 'moduml diff <rev1> <rev2> [path]'
+    The python files are read straight from the git object store, so nothing is checked out.
+    Files are summarized once per blob (i.e. per content), so files that didn't change are summarized once,
+    and summaries are kept in a blob cache, shared by all diffs of the repository.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+import os
+import subprocess
+
+from . import discovery
+from . import network
+from .module.cache import BlobCache
+from .module.index import ModuleIndex
+from .module.interface import ModuleInterface
+from .module.registry import CHUNKSIZE, PARSE_ERRORS, ModuleRegistry, ModuleSummary, empty_summary, summarize_source
+from .network import ProjectGraph
+
+
+def _git(repo_path: Path, *args: str) -> bytes:
+    result = subprocess.run(["git", "-C", str(repo_path), *args], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def python_blobs(project_path: Path, rev: str, ignore: Iterable[str] = discovery.DEFAULT_IGNORES) -> Dict[Path, str]:
+    """ Returns the blob hash of each python file in a revision, by filepath (under project_path), in git's order.
+        Only the files in project_path (a directory in the repository) are listed.
+    """
+    rules = [r for r in (discovery.parse_ignore_pattern(p) for p in ignore) if r]
+    # paths are relative to project_path, which is the working directory of git
+    listing = _git(project_path, "ls-tree", "-r", "-z", rev)
+    blobs = {}
+    for entry in listing.split(b"\0"):
+        if not entry:
+            continue
+        info, _, name = entry.partition(b"\t")
+        _, object_type, blob = info.split()
+        rel_path = name.decode("utf-8", errors="surrogateescape")
+        if object_type != b"blob" or not rel_path.endswith(".py"):
+            continue
+        if discovery.is_ignored_file(rules, tuple(rel_path.split("/"))):
+            continue
+        blobs[project_path / rel_path] = blob.decode()
+    return blobs
+
+
+def read_blobs(repo_path: Path, blobs: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+    """ Yield the (hash, content) of blobs, read with a single 'git cat-file --batch' process.
+    """
+    with subprocess.Popen(["git", "-C", str(repo_path), "cat-file", "--batch"],
+                          stdin=subprocess.PIPE,
+                          stdout=subprocess.PIPE
+                          ) as process:
+        assert process.stdin is not None and process.stdout is not None
+        try:
+            for blob in blobs:
+                # one at a time, so neither pipe fills up
+                process.stdin.write(blob.encode() + b"\n")
+                process.stdin.flush()
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    raise RuntimeError(f"Cannot read blob {blob} from git: {b' '.join(header).decode()}")
+                content = process.stdout.read(int(header[2]))
+                process.stdout.read(1) # newline after the content
+                yield blob, content
+        finally:
+            process.stdin.close()
+
+
+def _summarize_blob(content: bytes, filename: str, parser: str) -> ModuleSummary:
+    try:
+        return summarize_source(content, filename=filename, parser=parser)
+    except PARSE_ERRORS as e:
+        # e.g. a python 2 file in an old revision
+        logging.warning(f"Cannot parse '{filename}', drawn without imports and interface: {e}")
+        return empty_summary()
+
+
+def _summarize_blobs(batch: List[Tuple[str, bytes, str]], parser: str) -> List[ModuleSummary]:
+    # one task for a worker process
+    return [_summarize_blob(content, filename=filename, parser=parser) for _,content,filename in batch]
+
+
+def summarize_blobs(repo_path: Path,
+                    blobs: Dict[str, str],
+                    parser: str = "ast",
+                    cache: Optional[BlobCache] = None,
+                    jobs: int = 1
+                    ) -> Dict[str, ModuleSummary]:
+    """ Returns the summary of each blob, by hash. Blobs that aren't in the cache are read from git and parsed.
+        blobs: hash -> filename, used in messages
+    """
+    summaries: Dict[str, ModuleSummary] = {}
+    missing = []
+    for blob in blobs:
+        summary = cache.get(blob) if cache else None
+        if summary is None:
+            missing.append(blob)
+        else:
+            summaries[blob] = summary
+
+    contents = ((blob, content, blobs[blob]) for blob,content in read_blobs(repo_path, missing))
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1:
+        # read before the workers are forked, else they hold the pipe to git open, and git never exits
+        contents = iter(list(contents))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            batches: List[List[Tuple[str, bytes, str]]] = []
+            futures = []
+            batch: List[Tuple[str, bytes, str]] = []
+            for item in contents:
+                batch.append(item)
+                if len(batch) == CHUNKSIZE:
+                    batches.append(batch)
+                    futures.append(executor.submit(_summarize_blobs, batch, parser=parser))
+                    batch = []
+            if batch:
+                batches.append(batch)
+                futures.append(executor.submit(_summarize_blobs, batch, parser=parser))
+            for batch, future in zip(batches, futures):
+                for (blob,_,_), summary in zip(batch, future.result()):
+                    summaries[blob] = summary
+    else:
+        for blob, content, filename in contents:
+            summaries[blob] = _summarize_blob(content, filename=filename, parser=parser)
+
+    if cache:
+        for blob in missing:
+            cache.put(blob, summaries[blob])
+    return summaries
+
+
+def revision_graph(project_path: Path, blobs: Dict[Path, str], summaries: Dict[str, ModuleSummary]) -> ProjectGraph:
+    """ The graph of a revision, from the blob hash of each file and the summary of each blob.
+    """
+    registry = ModuleRegistry()
+    for filepath, blob in blobs.items():
+        registry.add(filepath, summaries[blob])
+    filepaths = list(blobs)
+    return network.create(filepaths, project_path=project_path, registry=registry, index=ModuleIndex(filepaths, project_path=project_path))
+
+
+def interface_changes(old: Optional[ModuleInterface], new: Optional[ModuleInterface]) -> List[str]:
+    """ The names added to (+) and removed from (-) a module interface, e.g. ['+Foo', '-bar()', '+X']
+    """
+    def names(module_interface: Optional[ModuleInterface]) -> List[str]:
+        if module_interface is None:
+            return []
+        return [c.name for c in module_interface.class_defs] +\
+               [f"{f.name}()" for f in module_interface.function_defs] +\
+               module_interface.single_assignments
+    old_names, new_names = names(old), names(new)
+    return [f"+{n}" for n in new_names if n not in old_names] + [f"-{n}" for n in old_names if n not in new_names]
+
+
+def diff_graph(old: ProjectGraph, new: ProjectGraph, old_blobs: Dict[Path, str], new_blobs: Dict[Path, str]) -> ProjectGraph:
+    """ The union of the graphs of two revisions, with what changed between them:
+            file nodes: '_change' is 'added', 'removed' or 'changed' (interface), with '_interface_changes'
+            import links: the graph attribute 'link_changes' maps (src, dst) posix paths to 'added' or 'removed'
+        Removed files keep their old interface, the other files have their new one.
+    """
+    g = new.copy()
+    for n,attr in old.nodes(data=True):
+        if n not in g:
+            g.add_node(n, **attr)
+    for n in g.nodes_of_type("file"):
+        if n not in old_blobs:
+            g.nodes[n]["_change"] = "added"
+        elif n not in new_blobs:
+            g.nodes[n]["_change"] = "removed"
+        elif old_blobs[n] != new_blobs[n]:
+            changes = interface_changes(old.nodes[n].get("_interface"), new.nodes[n].get("_interface"))
+            if changes:
+                g.nodes[n]["_change"] = "changed"
+                g.nodes[n]["_interface_changes"] = changes
+
+    link_changes: Dict[Tuple[str, str], str] = {}
+    for src,dst,attr in old.edges_of_type("hierarchy"):
+        if not g.has_edge(src, dst):
+            g.add_edge(src, dst, **attr)
+    for src,dst,attr in old.edges_of_type("import"):
+        if not new.has_edge(src, dst):
+            g.add_edge(src, dst, **attr)
+            link_changes[(src.as_posix(), dst.as_posix())] = "removed"
+    for src,dst,_ in new.edges_of_type("import"):
+        if not old.has_edge(src, dst):
+            link_changes[(src.as_posix(), dst.as_posix())] = "added"
+    g.graph["link_changes"] = link_changes
+    return g
@@ -1,55 +1,88 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Set, Union
 from pathlib import Path
-import argparse
+import math
 
 import networkx as nx
 import pydot
 
-from .layout_types import DirLayout, FileLayout, EdgeLayout
-from .network import filter_nodes, filter_links
+from .layout_types import CollapsedLayout, DirLayout, FileLayout, EdgeLayout
+from .module.imports import IMPORT_KINDS
+from .network import CompactGraph
+from .options import RenderOptions
 
 
-# Global reference to program args, assigned from outside this module.
-ARGS: argparse.Namespace = None
+# (color, style) of import links of each kind, see module.imports.IMPORT_KINDS
+IMPORT_LINK_STYLES = {
+    "eager":    ("black", "dashed"),
+    "guarded":  ("darkorange3", "dashed"),
+    "typing":   ("gray50", "dotted"),
+    "deferred": ("royalblue", "dotted"),
+}
 
-
-
-def _handle_weird_pydot_name(cluster_node: Path) -> str:
-    """ pydot.Node names appear to be wrapped in an extra layer of strings
-            e.g. "dir1/file1.py" --> '"dir1/file1.py"'
-        So, pass string through Node constructor and retrieve name, in order to replicate.
-    """
-    cluster_node_name = pydot.Node(name=cluster_node.as_posix()).get_name()
-    return cluster_node_name
+# fill color of the files and color of the import links that changed between two revisions, see gitdiff.diff_graph
+CHANGE_COLORS = {
+    "added":   "palegreen",
+    "removed": "lightpink",
+    "changed": "khaki1",
+}
+LINK_CHANGE_COLORS = {
+    "added":   "forestgreen",
+    "removed": "red",
+}
 
 
 class GraphVizBuilder:
     def __init__(self, 
-                 network: nx.DiGraph, 
+                 network: Union[nx.DiGraph, CompactGraph], 
                  project_path: Path, 
-                 rankdir: str = "TB"
+                 options: RenderOptions = RenderOptions()
                  ) -> None:
-        self.rankdir = rankdir
-        self.network: nx.DiGraph = network
+        self.options = options
+        # nodes are the integer ids of the compact graph, Paths are only made for the nodes drawn
+        self.network: CompactGraph = network if isinstance(network, CompactGraph) else CompactGraph.from_graph(network)
         self.project_path = project_path
 
-        self.file_nodes = filter_nodes(network, "file", data=False)
-        self.dir_nodes = filter_nodes(network, "dir", data=False)
+        self.file_nodes = self.network.nodes_of_type("file")
+        self.dir_nodes = self.network.nodes_of_type("dir")
+        # directories that files are collapsed into, see network.collapse
+        self.collapsed_nodes = self.network.nodes_of_type("collapsed")
+        # directories are linked by bundled import links, see network.bundle_imports
+        linked_nodes: Set[int] = set(self.file_nodes) | set(self.collapsed_nodes) | set(self.dir_nodes)
+        # (src, dst, kind, weight) of each link
         self.internal_import_links =\
-            [(src,dst) for src,dst,_ in filter_links(network, "import") if src in self.file_nodes and dst in self.file_nodes]
-        self.hierarchy_links = filter_links(network, "hierarchy")
+            [link for link in self.network.links["import"] if link[0] in linked_nodes and link[1] in linked_nodes]
+        self.hierarchy_links = [(src,dst) for src,dst,_,_ in self.network.links["hierarchy"]]
+
+        # children of each directory, and the directories that are packages (contain an __init__.py)
+        self.dir_children: Dict[int, List[int]] = {n: [] for n in self.dir_nodes}
+        for src,dst in self.hierarchy_links:
+            self.dir_children.setdefault(src, []).append(dst)
+        names = self.network.names
+        self.packages: Set[int] =\
+            {n for n,children in self.dir_children.items() if any(names[c].rpartition("/")[2] == "__init__.py" for c in children)}
+
+        # color of each highlighted node, from the importers of the highlighted packages.
+        # a node importing several of them gets the color of the first one.
+        self.highlight_colors: Dict[int, str] = {}
+        for package, color in options.highlight_colors():
+            ext_package = self.network.node_id(Path(package))
+            if ext_package is None:
+                continue
+            for src in self.network.links["import"].predecessors(ext_package):
+                self.highlight_colors.setdefault(src, color)
+
+        # slowest import, for coloring files by their import time relative to it
+        self.max_import_time = 0
+        if options.import_metrics:
+            self.max_import_time = max(self.network.attributes.get("_import_time", {}).values(), default=0)
 
         self.reset()
 
     def reset(self) -> None:
-        self._graph = pydot.Dot(graph_type="digraph", 
-                                rankdir=self.rankdir,
-                                fontname="Helvetica",
-                                concentrate=ARGS.combine_links, # combine edges when possible
-                                nodesep=ARGS.nodesep,
-                                ranksep=ARGS.ranksep
-                                )
+        self._graph = pydot.Dot(graph_type="digraph", **self.graph_attributes())
         self._graph.set_node_defaults(fontname="Helvetica")
+        # file nodes added to _graph, by node
+        self._file_layouts: Dict[int, FileLayout] = {}
 
     @property
     def graph(self) -> pydot.Dot:
@@ -58,79 +91,158 @@ class GraphVizBuilder:
         return product
 
 
+    def graph_attributes(self) -> Dict[str, Any]:
+        return dict(rankdir=self.options.rankdir,
+                    fontname="Helvetica",
+                    concentrate=self.options.combine_links, # combine edges when possible
+                    nodesep=self.options.nodesep,
+                    ranksep=self.options.ranksep
+                    )
+
+    def node_color(self, n: int) -> Optional[str]:
+        if n in self.highlight_colors:
+            return self.highlight_colors[n]
+        change = self.network.node_attribute(n, "_change")
+        if change is not None:
+            return CHANGE_COLORS[change]
+        import_time = self.network.node_attribute(n, "_import_time")
+        if self.max_import_time and import_time is not None:
+            # white to red, as HSV
+            return f"0.000 {import_time / self.max_import_time:.3f} 1.000"
+        return None
+
+    def file_metrics(self, n: int) -> Optional[str]:
+        """ E.g. '12 modules, 3 packages, 45.1 ms', for the transitive imports of a file.
+        """
+        if not self.options.import_metrics:
+            return None
+        closure = self.network.node_attribute(n, "_closure")
+        import_time = self.network.node_attribute(n, "_import_time")
+        metrics = []
+        if closure is not None:
+            internal, external = closure
+            metrics.append(f"{internal} modules, {external} packages")
+        if import_time is not None:
+            metrics.append(f"{import_time / 1000:.1f} ms")
+        return ", ".join(metrics) or None
+
+    def file_changes(self, n: int) -> Optional[str]:
+        """ E.g. '+Foo, -bar()', the names added to and removed from the interface of a file between two revisions.
+        """
+        interface_changes = self.network.node_attribute(n, "_interface_changes")
+        return ", ".join(interface_changes) if interface_changes else None
+
+    def link_change(self, src: int, dst: int) -> Optional[str]:
+        """ 'added' or 'removed', for an import link that changed between two revisions.
+        """
+        link_changes = self.network.graph.get("link_changes")
+        if not link_changes:
+            return None
+        return link_changes.get((self.network.names[src], self.network.names[dst]))
+
+    def file_layout_kwargs(self, n: int, with_interface: bool) -> Dict[str, Any]:
+        """ Arguments for the layout of a file node, see layout_types.file_node_attributes
+        """
+        node_color = self.node_color(n)
+        metrics = [m for m in (self.file_metrics(n), self.file_changes(n)) if m]
+        return dict(node=self.network.path(n), 
+                    with_interface=with_interface,
+                    module_interface=self.network.node_attribute(n, "_interface"),
+                    color=node_color,
+                    full_filepath=self.options.full_filepath,
+                    show_class_bases=self.options.show_class_bases,
+                    show_func_decorators=self.options.show_func_decorators,
+                    show_func_return_type=self.options.show_func_return_type,
+                    metrics="\\n".join(metrics) or None
+                    )
+
+    def collapsed_layout_kwargs(self, n: int, with_interface: bool) -> Dict[str, Any]:
+        """ Arguments for the layout of a collapsed directory, see layout_types.collapsed_node_attributes
+        """
+        return dict(node=self.network.path(n),
+                    counts=self.network.node_attribute(n, "_counts"),
+                    is_package=self.network.node_attribute(n, "_is_package"),
+                    with_interface=with_interface,
+                    full_filepath=self.options.full_filepath,
+                    color=self.node_color(n)
+                    )
+
+    def hierarchy_link_attributes(self) -> Dict[str, Any]:
+        return dict(color="gray", style="solid")
+
+    def import_link_attributes(self, weight: int = 1, kind: str = "eager", change: Optional[str] = None) -> Dict[str, Any]:
+        """ weight: number of imports merged into the link, shown as its label and width
+            kind: when the import is executed, see IMPORT_KINDS
+            change: 'added' or 'removed' between two revisions, shown as its color
+        """
+        color, style = IMPORT_LINK_STYLES[kind]
+        if change is not None:
+            color = LINK_CHANGE_COLORS[change]
+        attributes = dict(color=color, 
+                          style=style, 
+                          constraint=(not self.options.ignore_imports)
+                          )
+        if weight > 1:
+            attributes.update(label=str(weight), penwidth=round(1 + math.log2(weight), 1))
+        return attributes
+
     def add_file_nodes(self, with_interface: bool = False) -> None:
         for n in self.file_nodes:
-            node_color = None
-            ext_package = Path(ARGS.highlight) if ARGS.highlight else None
-            if self.network.has_edge(n, ext_package) and self.network.edges[n, ext_package]["_type"] == "import":
-                # node_color = "red"
-                node_color = "lightskyblue1"
-            node = FileLayout(node=n, 
-                              with_interface=with_interface,
-                              color=node_color,
-                              full_filepath=ARGS.full_filepath,
-                              show_class_bases=ARGS.show_class_bases,
-                              show_func_decorators=ARGS.show_func_decorators,
-                              show_func_return_type=ARGS.show_func_return_type
-                              )
+            node = FileLayout(**self.file_layout_kwargs(n, with_interface=with_interface))
             self._graph.add_node(node)
+            self._file_layouts[n] = node
+
+    def add_collapsed_nodes(self, with_interface: bool = False) -> None:
+        for n in self.collapsed_nodes:
+            node = CollapsedLayout(**self.collapsed_layout_kwargs(n, with_interface=with_interface))
+            self._graph.add_node(node)
+            self._file_layouts[n] = node
 
     def add_dir_nodes(self) -> None:
         for n in self.dir_nodes:
-            node = DirLayout(network=self.network, node=n)
+            node = DirLayout(node=self.network.path(n), is_package=(n in self.packages))
             self._graph.add_node(node)
 
     def add_dir_clusters(self) -> None:
         for n in self.dir_nodes:
-            c = pydot.Cluster(n.as_posix(), 
+            c = pydot.Cluster(self.network.names[n], 
                             #  label=n.relative_to(n.parent).as_posix(), 
-                             label=n.as_posix(),
+                             label=self.network.names[n],
                              color="gray")
             # add nodes to cluster
             cluster_nodes =\
-                [dst for src,dst,_ in self.hierarchy_links if src==n and self.network.nodes[dst]["_type"] == "file"]
+                [dst for dst in self.dir_children[n] if dst in self._file_layouts]
 
-            # find cluster nodes in _graph instead of g
+            # use the nodes already added to _graph instead of g
             for c_node in cluster_nodes:
-                c_node_name = _handle_weird_pydot_name(cluster_node=c_node)
-                # returns a list, get first item 
-                node_list = self._graph.get_node( c_node_name )
-                assert len(node_list) == 1, "only one node should exist with given name"
-                node = node_list[0]
-                c.add_node(node)
+                c.add_node(self._file_layouts[c_node])
 
             # add cluster to graph
             self._graph.add_subgraph(c)
 
 
     def add_hierarchy_links(self) -> None:
-        for src,dst,_ in self.hierarchy_links:
-            edge = EdgeLayout(src=src, dst=dst, color="gray", style="solid")
+        for src,dst in self.hierarchy_links:
+            edge = EdgeLayout(src=self.network.path(src), dst=self.network.path(dst), **self.hierarchy_link_attributes())
             self._graph.add_edge(edge)
 
 
     def add_import_links(self) -> None:
-        for src,dst in self.internal_import_links:
-            edge = EdgeLayout(src=src, 
-                              dst=dst, 
-                              color="black", 
-                              style="dashed", 
-                              constraint=(not ARGS.ignore_imports)
-                              )
+        for src,dst,kind,weight in self.internal_import_links:
+            link_attributes = self.import_link_attributes(weight=weight, kind=IMPORT_KINDS[kind], change=self.link_change(src, dst))
+            edge = EdgeLayout(src=self.network.path(src), dst=self.network.path(dst), **link_attributes)
             self._graph.add_edge(edge)
 
 
-def build_dot_layout(network: nx.DiGraph, 
-                     project_path: Path, 
-                     dir_as: str = "node",
-                     show_interface: bool = False,
-                     show_imports: bool = False
-                     ) -> pydot.Dot:
-    builder = GraphVizBuilder(network=network, 
-                              project_path=project_path,
-                              rankdir=ARGS.rankdir
-                              )
+def add_layout(builder: GraphVizBuilder,
+               dir_as: str = "node",
+               show_interface: bool = False,
+               show_imports: bool = False
+               ) -> None:
+    """ Add the nodes and links of a view to a builder.
+    """
     builder.add_file_nodes(with_interface=show_interface)
+    builder.add_collapsed_nodes(with_interface=show_interface)
 
     if dir_as == "node":
         builder.add_dir_nodes()
@@ -145,4 +257,14 @@ def build_dot_layout(network: nx.DiGraph,
     if show_imports:
         builder.add_import_links()
 
+
+def build_dot_layout(network: Union[nx.DiGraph, CompactGraph], 
+                     project_path: Path, 
+                     options: RenderOptions = RenderOptions()
+                     ) -> pydot.Dot:
+    builder = GraphVizBuilder(network=network, 
+                              project_path=project_path,
+                              options=options
+                              )
+    add_layout(builder, dir_as=options.dir_as, show_interface=options.show_interface, show_imports=options.show_imports)
     return builder.graph
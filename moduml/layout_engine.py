@@ -0,0 +1,74 @@
+""" Running the GraphViz layout engines, with bounded cost for large graphs.
+"""
+from pathlib import Path
+from typing import Callable, Optional, TextIO
+import subprocess
+
+
+ENGINES = ["auto", "dot", "sfdp", "neato", "fdp", "twopi"]
+
+# Above either size, 'auto' picks sfdp, since dot's hierarchical layout scales badly with the graph size.
+AUTO_MAX_NODES = 1000
+AUTO_MAX_EDGES = 3000
+
+
+class LayoutTimeout(Exception):
+    pass
+
+
+def select_engine(engine: str, n_nodes: int, n_edges: int) -> str:
+    """ Returns the GraphViz program to use, resolving 'auto' by the size of the graph.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine cannot take value: {engine}")
+    if engine != "auto":
+        return engine
+    if n_nodes > AUTO_MAX_NODES or n_edges > AUTO_MAX_EDGES:
+        return "sfdp"
+    return "dot"
+
+
+def render_image(write_dot: Callable[[TextIO], None],
+                 output_file: str,
+                 prog: str = "dot",
+                 timeout: Optional[float] = None
+                 ) -> None:
+    """ Lay out a graph with a GraphViz program, and write the image file.
+        The image format is given by the file extension.
+        write_dot: writes the DOT string to the given file object, i.e. the stdin of the GraphViz process
+        timeout: seconds, after which the GraphViz process is killed and LayoutTimeout raised
+    """
+    file_ext = output_file.split(".")[-1]
+    try:
+        proc = subprocess.Popen([prog, f"-T{file_ext}", "-o", output_file], stdin=subprocess.PIPE, text=True)
+    except FileNotFoundError:
+        raise RuntimeError(f"GraphViz program '{prog}' not found, is GraphViz installed?") from None
+    try:
+        write_dot(proc.stdin)
+        proc.stdin.close()
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        # don't leave a partially written image behind
+        Path(output_file).unlink(missing_ok=True)
+        raise LayoutTimeout(f"GraphViz '{prog}' did not finish within {timeout} seconds")
+    finally:
+        if not proc.stdin.closed:
+            proc.stdin.close()
+    if returncode != 0:
+        raise RuntimeError(f"GraphViz '{prog}' failed with exit code {returncode}")
+
+
+def render_image_data(dot: str, file_format: str, prog: str = "dot", timeout: Optional[float] = None) -> bytes:
+    """ Same as render_image, but returns the image (e.g. 'svg' or 'png') instead of writing a file.
+    """
+    try:
+        result = subprocess.run([prog, f"-T{file_format}"], input=dot.encode(), capture_output=True, timeout=timeout)
+    except FileNotFoundError:
+        raise RuntimeError(f"GraphViz program '{prog}' not found, is GraphViz installed?") from None
+    except subprocess.TimeoutExpired:
+        raise LayoutTimeout(f"GraphViz '{prog}' did not finish within {timeout} seconds") from None
+    if result.returncode != 0:
+        raise RuntimeError(f"GraphViz '{prog}' failed with exit code {result.returncode}: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
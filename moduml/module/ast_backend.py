@@ -0,0 +1,75 @@
+""" Extraction backend based on the standard library's ast module.
+    Produces the same import statements and module interface as the astroid based extraction,
+    from a much lighter (faster to build, smaller) syntax tree.
+"""
+from pathlib import Path
+from typing import List, Optional, Union
+import ast
+
+from .imports import ImportStatement, walk_imports
+from .interface import ClassInterface, FunctionInterface, ModuleInterface
+
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+
+def parse_python_file(filepath: Path) -> ast.Module:
+    """ Parse a python file with ast.
+        Reads bytes, so ast can honor the file's encoding declaration.
+    """
+    with open(filepath, "rb") as fh:
+        code: bytes = fh.read()
+    return ast.parse(code, filename=str(filepath))
+
+
+def _to_import(e: ast.AST, kind: str) -> Optional[ImportStatement]:
+    if isinstance(e, ast.ImportFrom):
+        names = tuple((a.name, a.asname) for a in e.names)
+        return ImportStatement(e.module or "", names, e.level, True, kind)
+    elif isinstance(e, ast.Import):
+        names = tuple((a.name, a.asname) for a in e.names)
+        return ImportStatement("", names, 0, False, kind)
+    return None
+
+
+def _is_type_checking(test: ast.expr) -> bool:
+    # TYPE_CHECKING or typing.TYPE_CHECKING
+    return (isinstance(test, ast.Name) and test.id == "TYPE_CHECKING") or\
+           (isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING")
+
+
+def extract_imports(module: ast.Module) -> List[ImportStatement]:
+    """ Returns the Import and ImportFrom statements anywhere in the module, with their kind.
+    """
+    return list(walk_imports(module.body, to_import=_to_import, is_type_checking=_is_type_checking))
+
+
+def get_single_assignments(m: ast.Module) -> List[str]:
+    """ Returns names of single assignments in top scope of a module.
+        E.g. "a = 11" --> "a". Ignore tuple case: "a, b = some_func()".
+    """
+    assigns = [e for e in m.body if isinstance(e, ast.Assign)]
+    return [a.targets[0].id for a in assigns if isinstance(a.targets[0], ast.Name)]
+
+
+def get_class_interface(c: ast.ClassDef) -> ClassInterface:
+    return ClassInterface(
+        name=c.name,
+        bases=[ast.unparse(base) for base in c.bases]
+    )
+
+
+def get_function_interface(f: FunctionNode) -> FunctionInterface:
+    return FunctionInterface(
+        name=f.name,
+        decorators=[ast.unparse(d) for d in f.decorator_list],
+        return_type=ast.unparse(f.returns) if f.returns else None
+    )
+
+
+def get_module_interface(module: ast.Module) -> ModuleInterface:
+    return ModuleInterface(
+        class_defs=[get_class_interface(e) for e in module.body if isinstance(e, ast.ClassDef)],
+        function_defs=[get_function_interface(e) for e in module.body if isinstance(e, (ast.FunctionDef, ast.AsyncFunctionDef))],
+        single_assignments=get_single_assignments(m=module)
+    )
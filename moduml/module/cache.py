@@ -0,0 +1,182 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+import hashlib
+import itertools
+import logging
+import os
+import pickle
+
+from .. import __version__
+from .registry import ModuleSummary
+
+
+# Directory of the cache in the project directory, unless another one is given.
+DEFAULT_CACHE_DIR = ".moduml_cache"
+
+# Bump when the layout of the cached summaries changes.
+CACHE_VERSION = 2
+
+# Most blob summaries kept by a BlobCache, the least recently used are dropped first.
+BLOB_CACHE_MAX_ENTRIES = 200_000
+
+
+class CacheEntry(NamedTuple):
+    mtime_ns: int
+    size:     int
+    digest:   str
+    summary:  ModuleSummary
+
+
+def _file_digest(filepath: Path) -> str:
+    with open(filepath, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def _load_entries(cache_file: Path) -> Dict[str, Any]:
+    if not cache_file.exists():
+        return {}
+    try:
+        with open(cache_file, "rb") as fh:
+            content = pickle.load(fh)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable cache file '{cache_file}': {e}")
+        return {}
+    if content.get("version") != (CACHE_VERSION, __version__):
+        return {}
+    return content["entries"]
+
+
+def _save_entries(cache_dir: Path, cache_file: Path, entries: Dict[str, Any]) -> None:
+    # write to a temporary file first, so an interrupted run can't leave a corrupt cache
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        gitignore = cache_dir / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text("# Created by moduml\n*\n")
+        with open(tmp_file, "wb") as fh:
+            pickle.dump({"version": (CACHE_VERSION, __version__), "entries": entries}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        # e.g. a read-only directory, the run itself doesn't need the cache
+        logging.warning(f"Cannot write cache file '{cache_file}', continuing without saving the cache: {e}")
+        try:
+            tmp_file.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+class AnalysisCache:
+    """ Persistent on-disk cache of module summaries for a single project.
+        Entries are keyed by the filepath relative to the project,
+        and validated by mtime and size, falling back to a content hash (e.g. after a fresh checkout).
+        Entries for files that were not requested during the run are evicted on save.
+    """
+    def __init__(self, cache_dir: Path, project_path: Path, parser: str = "ast") -> None:
+        self.cache_dir = cache_dir
+        self.project_path = project_path
+        project_id = hashlib.sha1(str(project_path.resolve()).encode()).hexdigest()[:16]
+        # summaries from different parsers are kept apart
+        self.cache_file = cache_dir / f"{project_id}-{parser}.pickle"
+        self._entries: Dict[str, CacheEntry] = self._load()
+        self._used: Dict[str, CacheEntry] = {}
+        # stat + digest of files that missed the cache, reused when their summary is put
+        self._pending: Dict[str, Tuple[int, int, str]] = {}
+        self._dirty = False
+        # number of stat calls and content hashes during this run
+        self.n_stat = 0
+        self.n_digest = 0
+
+    def _key(self, filepath: Path) -> str:
+        return filepath.relative_to(self.project_path).as_posix()
+
+    def _load(self) -> Dict[str, CacheEntry]:
+        return _load_entries(self.cache_file)
+
+    def get(self, filepath: Path) -> Optional[ModuleSummary]:
+        """ Returns the cached summary of a file, if the file is unchanged since it was cached.
+        """
+        key = self._key(filepath)
+        stat = os.stat(filepath)
+        self.n_stat += 1
+        entry = self._entries.get(key)
+        if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            self._used[key] = entry
+            return entry.summary
+
+        digest = _file_digest(filepath)
+        self.n_digest += 1
+        if entry and entry.digest == digest:
+            # same content, only the file metadata changed
+            self._used[key] = entry._replace(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self._dirty = True
+            return entry.summary
+
+        self._pending[key] = (stat.st_mtime_ns, stat.st_size, digest)
+        return None
+
+    def put(self, filepath: Path, summary: ModuleSummary) -> None:
+        key = self._key(filepath)
+        if key in self._pending:
+            mtime_ns, size, digest = self._pending.pop(key)
+        else:
+            stat = os.stat(filepath)
+            mtime_ns, size, digest = stat.st_mtime_ns, stat.st_size, _file_digest(filepath)
+            self.n_stat += 1
+            self.n_digest += 1
+        self._used[key] = CacheEntry(mtime_ns, size, digest, summary)
+        self._dirty = True
+
+    def discard(self, filepaths: Iterable[Path]) -> None:
+        """ Stop keeping the entries of files, e.g. because they were removed.
+        """
+        for filepath in filepaths:
+            key = self._key(filepath)
+            if self._used.pop(key, None):
+                self._dirty = True
+
+    def save(self) -> None:
+        """ Write the entries used during this run to disk, dropping entries of deleted files.
+        """
+        if not self._dirty and self._used.keys() == self._entries.keys():
+            return
+        _save_entries(self.cache_dir, self.cache_file, self._used)
+        self._entries = dict(self._used)
+        self._dirty = False
+
+
+class BlobCache:
+    """ Persistent on-disk cache of module summaries, keyed by git blob hash, i.e. by the content of a file.
+        Entries never go stale, so they are shared by all revisions (and diffs) of a repository.
+        The least recently used entries are dropped above max_entries.
+    """
+    def __init__(self, cache_dir: Path, parser: str = "ast", max_entries: int = BLOB_CACHE_MAX_ENTRIES) -> None:
+        self.cache_dir = cache_dir
+        self.cache_file = cache_dir / f"blobs-{parser}.pickle"
+        self.max_entries = max_entries
+        # in order of last use
+        self._entries: Dict[str, ModuleSummary] = _load_entries(self.cache_file)
+        self._dirty = False
+
+    def __contains__(self, blob: str) -> bool:
+        return blob in self._entries
+
+    def get(self, blob: str) -> Optional[ModuleSummary]:
+        summary = self._entries.pop(blob, None)
+        if summary is not None:
+            self._entries[blob] = summary
+            self._dirty = True
+        return summary
+
+    def put(self, blob: str, summary: ModuleSummary) -> None:
+        self._entries.pop(blob, None)
+        self._entries[blob] = summary
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        for blob in list(itertools.islice(self._entries, max(0, len(self._entries) - self.max_entries))):
+            del self._entries[blob]
+        _save_entries(self.cache_dir, self.cache_file, self._entries)
+        self._dirty = False
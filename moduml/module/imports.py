@@ -1,12 +1,80 @@
 
 import pathlib
-from pathlib import Path, PurePath
-from typing import Any, List, Dict, Optional, Tuple, Union
-from functools import singledispatch
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Dict, NamedTuple, Optional, Tuple
 
 import astroid
 import networkx as nx
 
+if TYPE_CHECKING:
+    from .index import ModuleIndex
+
+
+# When an import is executed, from most to least eager:
+#   eager:    at the top level of the module, i.e. when the module is imported
+#   guarded:  inside a try or if (or match), i.e. maybe when the module is imported
+#   typing:   inside an 'if TYPE_CHECKING:', i.e. only by type checkers
+#   deferred: inside a function, i.e. only when the function is called
+IMPORT_KINDS = ["eager", "guarded", "typing", "deferred"]
+
+
+def _least_eager(kind1: str, kind2: str) -> str:
+    return max(kind1, kind2, key=IMPORT_KINDS.index)
+
+
+def most_eager(kind1: str, kind2: str) -> str:
+    return min(kind1, kind2, key=IMPORT_KINDS.index)
+
+
+class ImportStatement(NamedTuple):
+    """ Compact record of an Import or ImportFrom statement.
+        Mirrors the attributes of astroid's Import/ImportFrom nodes that are used to create import paths.
+        Ex:
+            from ..modname import name1 as n1 --> ImportStatement("modname", (("name1", "n1"),), 2, True)
+            import mod --> ImportStatement("", (("mod", None),), 0, False)
+    """
+    modname: str
+    names:   Tuple[Tuple[str, Optional[str]], ...]
+    level:   int
+    is_from: bool
+    kind:    str = "eager" # see IMPORT_KINDS
+
+
+def walk_imports(stmts: Iterable[Any], 
+                 to_import: Callable[[Any, str], Optional[ImportStatement]],
+                 is_type_checking: Callable[[Any], bool],
+                 kind: str = "eager"
+                 ) -> Iterator[ImportStatement]:
+    """ Yield the import statements in a list of statements and all statements nested in them, 
+        with the kind of each import, see IMPORT_KINDS.
+        Works for both ast and astroid nodes, since their statement classes and fields have the same names.
+        to_import: import statement of a node, or None if it isn't an Import/ImportFrom
+        is_type_checking: whether the test of an If is TYPE_CHECKING
+    """
+    for e in stmts:
+        imp = to_import(e, kind)
+        if imp is not None:
+            yield imp
+            continue
+        node_type = type(e).__name__
+        if node_type in ("FunctionDef", "AsyncFunctionDef"):
+            yield from walk_imports(e.body, to_import, is_type_checking, kind="deferred")
+        elif node_type == "ClassDef":
+            # a class body is executed where the class is defined
+            yield from walk_imports(e.body, to_import, is_type_checking, kind=kind)
+        elif node_type == "If" and is_type_checking(e.test):
+            yield from walk_imports(e.body, to_import, is_type_checking, kind=_least_eager(kind, "typing"))
+            yield from walk_imports(e.orelse, to_import, is_type_checking, kind=_least_eager(kind, "guarded"))
+        else:
+            # if, try, match: maybe executed. with, for, while: executed where they are
+            guarded = node_type in ("If", "Try", "TryStar", "TryExcept", "TryFinally", "Match")
+            nested_kind = _least_eager(kind, "guarded") if guarded else kind
+            for field in ("body", "handlers", "orelse", "finalbody", "cases"):
+                for child in getattr(e, field, None) or []:
+                    # except handlers and match cases hold a body of statements
+                    child_stmts = child.body if type(child).__name__ in ("ExceptHandler", "match_case", "MatchCase") else [child]
+                    yield from walk_imports(child_stmts, to_import, is_type_checking, kind=nested_kind)
+
 
 class BaseImportPath:
     def __init__(self, path) -> None:
@@ -22,11 +90,14 @@ class BaseImportPath:
     def __truediv__(self, key):
         return self.path.__truediv__(key)
 
-    def try_to_qualify(self):
+    def try_to_qualify(self, index: Optional["ModuleIndex"] = None):
         raise NotImplementedError
 
     @staticmethod
-    def try_to_qualify_import_path(import_path: Path) -> Optional[Path]:
+    def try_to_qualify_import_path(import_path: Path, index: Optional["ModuleIndex"] = None) -> Optional[Path]:
+        # look up in the project's module index, if available, instead of the filesystem
+        if index is not None:
+            return index.lookup(import_path)
         # imports a module, if it points to a .py file with same name
         module_import = Path( str(import_path) + ".py" )
         # imports a package, if it points to a dir with a __init__.py file
@@ -41,13 +112,13 @@ class ImportPath(BaseImportPath):
     def __init__(self, path) -> None:
         super().__init__(path)
 
-    def try_to_qualify(self) -> Optional[Path]:
+    def try_to_qualify(self, index: Optional["ModuleIndex"] = None) -> Optional[Path]:
         """ Import can import: module or package, but not element in either.
             Examples:
                 package/module --> package/module.py
                 package --> package/__init__.py
         """
-        qual_import = BaseImportPath.try_to_qualify_import_path(self.path)
+        qual_import = BaseImportPath.try_to_qualify_import_path(self.path, index=index)
         if qual_import and qual_import.suffix == ".py":
             return qual_import
         return None
@@ -57,7 +128,7 @@ class ImportFromPath(BaseImportPath):
     def __init__(self, path) -> None:
         super().__init__(path)
     
-    def try_to_qualify(self) -> Optional[Path]:
+    def try_to_qualify(self, index: Optional["ModuleIndex"] = None) -> Optional[Path]:
         """ ImportFrom can import: package, module or element in package or module
             Examples:
                 package/module/func --> package/module.py
@@ -65,20 +136,20 @@ class ImportFromPath(BaseImportPath):
                 package --> package/__init__.py
         """
         # if imports a module or package
-        qual_import = BaseImportPath.try_to_qualify_import_path(self.path)
+        qual_import = BaseImportPath.try_to_qualify_import_path(self.path, index=index)
         if qual_import and qual_import.suffix == ".py":
             return qual_import
 
         # if imports an element in a module or package
         # try to qualify import path parent
-        qual_import = BaseImportPath.try_to_qualify_import_path(self.path.parent)
+        qual_import = BaseImportPath.try_to_qualify_import_path(self.path.parent, index=index)
         if qual_import and qual_import.suffix == ".py":
             return qual_import
         # import from path could not be qualified
         return None
 
 
-def _to_rel_importfrom_paths(import_from: astroid.ImportFrom, module_path: Path) -> List[ImportFromPath]:
+def _to_rel_importfrom_paths(import_from: ImportStatement, module_path: Path) -> List[ImportFromPath]:
     """ Convert ImportFrom statement to import paths relative to module path.
         Ex: 
             import_from: from ..modname import name1 as n1, name2
@@ -92,23 +163,43 @@ def _to_rel_importfrom_paths(import_from: astroid.ImportFrom, module_path: Path)
     return [ImportFromPath(p / n[0]) for n in import_from.names]
 
 
-def _to_abs_importfrom_paths(import_from: astroid.ImportFrom, project_path: Path) -> List[ImportFromPath]:
+def _to_abs_importfrom_paths(import_from: ImportStatement, project_path: Path) -> List[ImportFromPath]:
     assert not import_from.level, "level must NOT be present for an absolute import"
     path_strs = [(import_from.modname + "." + name).replace(".", "/") for name,alias in import_from.names]
     return [ImportFromPath(project_path / Path(p)) for p in path_strs]
 
 
-def _to_abs_import_paths(abs_import: astroid.Import, project_path: Path) -> List[ImportPath]:
+def _to_abs_import_paths(abs_import: ImportStatement, project_path: Path) -> List[ImportPath]:
     return [ImportPath(project_path / name.replace(".", "/")) for name,alias in abs_import.names]
 
     
-def relative_import_from(module: astroid.Module, module_path: Path) -> List[ImportFromPath]:
+def _to_import(e: astroid.NodeNG, kind: str) -> Optional[ImportStatement]:
+    if isinstance(e, astroid.ImportFrom):
+        return ImportStatement(e.modname, tuple(e.names), e.level or 0, True, kind)
+    elif isinstance(e, astroid.Import):
+        return ImportStatement("", tuple(e.names), 0, False, kind)
+    return None
+
+
+def _is_type_checking(test: astroid.NodeNG) -> bool:
+    # TYPE_CHECKING or typing.TYPE_CHECKING
+    return (isinstance(test, astroid.Name) and test.name == "TYPE_CHECKING") or\
+           (isinstance(test, astroid.Attribute) and test.attrname == "TYPE_CHECKING")
+
+
+def extract_imports(module: astroid.Module) -> List[ImportStatement]:
+    """ Returns the Import and ImportFrom statements anywhere in the module, with their kind.
+    """
+    return list(walk_imports(module.body, to_import=_to_import, is_type_checking=_is_type_checking))
+
+
+def relative_import_from(imports: List[ImportStatement], module_path: Path) -> List[ImportFromPath]:
     """ Returns the relative ImportFrom's of the module.
         Ex: relative ImportFrom
             from .mod1 import func1, func2
             from . import mod1, mod2
     """
-    rel_import_froms = [e for e in module.body if isinstance(e, astroid.ImportFrom) and e.level]
+    rel_import_froms = [e for e in imports if e.is_from and e.level]
 
     import_paths: List[ImportPath] = []
     for import_from in rel_import_froms:
@@ -116,13 +207,13 @@ def relative_import_from(module: astroid.Module, module_path: Path) -> List[Impo
     return import_paths
 
 
-def absolute_import_from(module: astroid.Module, project_path: Path) -> List[ImportPath]:
+def absolute_import_from(imports: List[ImportStatement], project_path: Path) -> List[ImportPath]:
     """ Returns the absolute ImportFrom's of the module.
         Ex: absolute ImportFrom
             from package1.mod import class, func
             from package1 import mod1 as m1, mod2
     """
-    abs_import_froms = [e for e in module.body if isinstance(e, astroid.ImportFrom) and not e.level]
+    abs_import_froms = [e for e in imports if e.is_from and not e.level]
 
     import_paths = []
     for imp in abs_import_froms:
@@ -130,24 +221,26 @@ def absolute_import_from(module: astroid.Module, project_path: Path) -> List[Imp
     return import_paths
 
 
-def absolute_import(module: astroid.Module, project_path: Path) -> List[ImportPath]:
+def absolute_import(imports: List[ImportStatement], project_path: Path) -> List[ImportPath]:
     """ Returns the absolute Import of the module.
         Ex: absolute Import
             import mod
     """
-    imports = [e for e in module.body if isinstance(e, astroid.Import)]
+    abs_imports = [e for e in imports if not e.is_from]
 
     import_paths = []
-    for imp in imports:
+    for imp in abs_imports:
         import_paths.extend( _to_abs_import_paths(abs_import=imp, project_path=project_path) )
     return import_paths
 
 
-def qualify_import_paths(import_paths: List[BaseImportPath]) -> Tuple[List[Path], List[BaseImportPath]]:
+def qualify_import_paths(import_paths: List[BaseImportPath], 
+                         index: Optional["ModuleIndex"] = None
+                         ) -> Tuple[List[Path], List[BaseImportPath]]:
     qual_paths = []
     non_qual_paths = []
     for p in import_paths:
-        maybe_qual = p.try_to_qualify()
+        maybe_qual = p.try_to_qualify(index=index)
         if maybe_qual: qual_paths.append(maybe_qual)
         else: non_qual_paths.append(p)
     return qual_paths, non_qual_paths
@@ -157,19 +250,20 @@ def is_dir(graph: nx.DiGraph, node: Path) -> bool:
     return len(list(graph.successors(node))) > 0
 
 
-def get_module_imports(module_path: Path, 
-                       module_ast: astroid.Module,
-                       project_path: Path
-                       ) -> Tuple[List[Path], List[Path]]:
-    # --- ImportFrom
-    # Import paths that do NOT point to specific python files
-    rel_import_from: List[Path] = relative_import_from(module=module_ast, module_path=module_path)
-    abs_import_from: List[Path] = absolute_import_from(module=module_ast, project_path=project_path)
-    # --- Import
-    abs_import: List[Path] = absolute_import(module=module_ast, project_path=project_path)
-
-    all_import_paths = abs_import + abs_import_from + rel_import_from
-    qual_import_paths, non_qual_import_paths = qualify_import_paths(import_paths=all_import_paths)
+def resolve_import(imp: ImportStatement, 
+                   module_path: Path, 
+                   project_path: Path, 
+                   index: Optional["ModuleIndex"] = None
+                   ) -> Tuple[List[Path], List[Path]]:
+    """ Returns the (internal files, external top-level packages) imported by a single statement.
+    """
+    if not imp.is_from:
+        import_paths = absolute_import(imports=[imp], project_path=project_path)
+    elif imp.level:
+        import_paths = relative_import_from(imports=[imp], module_path=module_path)
+    else:
+        import_paths = absolute_import_from(imports=[imp], project_path=project_path)
+    qual_import_paths, non_qual_import_paths = qualify_import_paths(import_paths=import_paths, index=index)
 
     for p in qual_import_paths:
         assert p.suffix == ".py", "all qualified paths must point to a .py file"
@@ -180,7 +274,47 @@ def get_module_imports(module_path: Path,
     # only show top-level package name for external imports
     # e.g. "from sklearn.mixtures import GMM" --> sklearn
     ext_toplevel_imports = [Path(ext.relative_to(project_path).parts[0]) for ext in non_qual_import_paths]
+    return qual_import_paths, ext_toplevel_imports
+
 
-    # remove duplicates
-    internal_imports = qual_import_paths
-    return list(set(internal_imports)), list(set(ext_toplevel_imports))
+def get_module_imports(module_path: Path, 
+                       imports: List[ImportStatement],
+                       project_path: Path,
+                       index: Optional["ModuleIndex"] = None
+                       ) -> Tuple[List[Path], List[Path]]:
+    """ Returns the (internal files, external top-level packages) imported by a module.
+        With an index, imports are resolved without filesystem access, and memoized.
+    """
+    internal_imports, ext_toplevel_imports = get_module_import_kinds(module_path=module_path,
+                                                                     imports=imports,
+                                                                     project_path=project_path,
+                                                                     index=index
+                                                                     )
+    return list(internal_imports), list(ext_toplevel_imports)
+
+
+def get_module_import_kinds(module_path: Path, 
+                            imports: List[ImportStatement],
+                            project_path: Path,
+                            index: Optional["ModuleIndex"] = None
+                            ) -> Tuple[Dict[Path, str], Dict[Path, str]]:
+    """ Same as get_module_imports, but with the kind of each import, see IMPORT_KINDS.
+        A file or package imported more than once gets the most eager kind.
+    """
+    # resolve in the order: Import, absolute ImportFrom, relative ImportFrom
+    abs_import = [e for e in imports if not e.is_from]
+    abs_import_from = [e for e in imports if e.is_from and not e.level]
+    rel_import_from = [e for e in imports if e.is_from and e.level]
+
+    # dicts keep the order of first occurrence, so output is stable between runs
+    internal_imports: Dict[Path, str] = {}
+    ext_toplevel_imports: Dict[Path, str] = {}
+    for imp in abs_import + abs_import_from + rel_import_from:
+        if index is not None:
+            qual, ext = index.resolve(imp=imp, module_path=module_path)
+        else:
+            qual, ext = resolve_import(imp=imp, module_path=module_path, project_path=project_path)
+        for imports_of_kind, paths in ((internal_imports, qual), (ext_toplevel_imports, ext)):
+            for p in paths:
+                imports_of_kind[p] = most_eager(imports_of_kind.get(p, imp.kind), imp.kind)
+    return internal_imports, ext_toplevel_imports
@@ -0,0 +1,49 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .imports import ImportStatement, resolve_import
+
+
+class ModuleIndex:
+    """ In-memory index of a project's python files.
+        Resolves import statements against the known files, i.e. without any filesystem access.
+        Resolution is memoized per (statement, package), since the same imports recur across a project.
+    """
+    def __init__(self, filepaths: Iterable[Path], project_path: Path) -> None:
+        self.project_path = project_path
+        self._files: Dict[str, Path] = {p.as_posix(): p for p in filepaths}
+        self._resolved: Dict[Tuple[ImportStatement, Optional[Path]], Tuple[List[Path], List[Path]]] = {}
+        # number of import statements resolved, and of those not already memoized
+        self.n_resolved = 0
+        self.n_unique = 0
+
+    def __contains__(self, filepath: Path) -> bool:
+        return filepath.as_posix() in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def lookup(self, import_path: Path) -> Optional[Path]:
+        """ Returns the file a module or package import path points to, if it is in the project.
+            Ex:
+                package/module --> package/module.py
+                package --> package/__init__.py
+        """
+        path_str = import_path.as_posix()
+        return self._files.get(path_str + ".py") or self._files.get(path_str + "/__init__.py")
+
+    def resolve(self, imp: ImportStatement, module_path: Path) -> Tuple[List[Path], List[Path]]:
+        """ Returns the (internal files, external top-level packages) imported by a statement.
+        """
+        # only relative imports depend on the importing module's package
+        package = module_path.parent if imp.level else None
+        key = (imp, package)
+        self.n_resolved += 1
+        if key not in self._resolved:
+            self.n_unique += 1
+            self._resolved[key] = resolve_import(imp=imp,
+                                                 module_path=module_path,
+                                                 project_path=self.project_path,
+                                                 index=self
+                                                 )
+        return self._resolved[key]
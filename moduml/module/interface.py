@@ -1,38 +1,61 @@
-from typing import List, Dict, Tuple
+from typing import List, Optional
 from dataclasses import dataclass
-from pathlib import Path
 
 import astroid
 
 
+@dataclass
+class ClassInterface:
+    name:  str
+    bases: List[str]
+
+
+@dataclass
+class FunctionInterface:
+    name:        str
+    decorators:  List[str]
+    return_type: Optional[str]
+
+
 @dataclass
 class ModuleInterface:
-    class_defs:         List[astroid.ClassDef]
-    function_defs:      List[astroid.FunctionDef]
-    single_assignments: List[astroid.AssignName]
+    class_defs:         List[ClassInterface]
+    function_defs:      List[FunctionInterface]
+    single_assignments: List[str]
 
 
-def get_single_assignments(m: astroid.Module) -> List[astroid.AssignName]:
-    """ Returns single assignments in top scope of a module.
+def get_single_assignments(m: astroid.Module) -> List[str]:
+    """ Returns names of single assignments in top scope of a module.
         Only include single assignment.
         E.g. "a = 11", where the first element/child if of type AssignName (= "a").
         Ignore tuple case: "a, b = some_func()".
-    """ 
+    """
     assigns = [e for e in m.body if isinstance(e, astroid.Assign)]
     single_assigns = [list(a.get_children())[0] for a in assigns if isinstance(list(a.get_children())[0], astroid.AssignName)]
-    return single_assigns
+    return [a.name for a in single_assigns]
+
+
+def get_class_interface(c: astroid.ClassDef) -> ClassInterface:
+    return ClassInterface(
+        name=c.name,
+        bases=[base.as_string() for base in c.bases]
+    )
+
+
+def get_function_interface(f: astroid.FunctionDef) -> FunctionInterface:
+    decorators = [d.as_string() for d in f.decorators.nodes] if f.decorators else []
+    return FunctionInterface(
+        name=f.name,
+        decorators=decorators,
+        return_type=f.returns.as_string() if f.returns else None
+    )
 
 
 def main(module: astroid.Module) -> ModuleInterface:
+    """ Extract a compact interface from a module, that does not reference the module's AST.
+    """
     return ModuleInterface(
-        class_defs=[e for e in module.body if isinstance(e, astroid.ClassDef)],
-        function_defs=[e for e in module.body if isinstance(e, astroid.FunctionDef)],
+        class_defs=[get_class_interface(e) for e in module.body if isinstance(e, astroid.ClassDef)],
+        function_defs=[get_function_interface(e) for e in module.body if isinstance(e, astroid.FunctionDef)],
         single_assignments=get_single_assignments(m=module)
     )
-
-
-def get_module_interface(module_path: Path) -> ModuleInterface:
-    with open(module_path) as fh:
-        code: str = fh.read()
-    m = astroid.parse(code)
-    return main(module=m)
@@ -0,0 +1,196 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+import ast
+import itertools
+import logging
+import os
+
+import astroid
+
+from .imports import ImportStatement, extract_imports
+from . import ast_backend
+from . import interface
+from .interface import ModuleInterface
+from ..network import utils
+
+if TYPE_CHECKING:
+    from .cache import AnalysisCache
+
+
+@dataclass
+class ModuleSummary:
+    """ Everything moduml needs from a module's AST.
+        Compact, i.e. holds no reference to the AST, which can be discarded after extraction.
+    """
+    imports:   List[ImportStatement]
+    interface: ModuleInterface
+
+
+# Available parsers, i.e. backends for extracting a module summary.
+PARSERS = ["ast", "astroid"]
+
+# Number of files per task sent to a worker process.
+CHUNKSIZE = 32
+
+# Errors raised for a file that can't be parsed, e.g. while it's being edited.
+PARSE_ERRORS = (SyntaxError, ValueError, UnicodeDecodeError, astroid.AstroidBuildingError)
+
+
+def summarize(module: astroid.Module) -> ModuleSummary:
+    return ModuleSummary(
+        imports=extract_imports(module=module),
+        interface=interface.main(module=module)
+    )
+
+
+def summarize_ast(module: ast.Module) -> ModuleSummary:
+    return ModuleSummary(
+        imports=ast_backend.extract_imports(module=module),
+        interface=ast_backend.get_module_interface(module=module)
+    )
+
+
+def empty_summary() -> ModuleSummary:
+    """ Summary of a file that can't be parsed, i.e. a module without imports and interface.
+    """
+    return ModuleSummary(imports=[], interface=ModuleInterface(class_defs=[], function_defs=[], single_assignments=[]))
+
+
+def summarize_file(filepath: Path, parser: str = "ast") -> ModuleSummary:
+    """ Parse and summarize a single file. The syntax tree is discarded right after extraction.
+        Module level function, so it can be sent to worker processes.
+    """
+    if parser == "ast":
+        return summarize_ast(module=ast_backend.parse_python_file(filepath))
+    elif parser == "astroid":
+        return summarize(module=utils.parse_python_file(filepath))
+    else:
+        raise ValueError(f"parser cannot take value: {parser}")
+
+
+def summarize_source(code: bytes, filename: str = "<unknown>", parser: str = "ast") -> ModuleSummary:
+    """ Same as summarize_file, for the contents of a file, e.g. a blob in git.
+    """
+    if parser == "ast":
+        return summarize_ast(module=ast.parse(code, filename=filename))
+    elif parser == "astroid":
+        return summarize(module=astroid.parse(code.decode("utf-8"), path=filename))
+    else:
+        raise ValueError(f"parser cannot take value: {parser}")
+
+
+def summarize_files(filepaths: List[Path], parser: str = "ast") -> List[ModuleSummary]:
+    """ Summarize a batch of files, i.e. one task for a worker process.
+    """
+    return [summarize_file(filepath, parser=parser) for filepath in filepaths]
+
+
+def _batched(items: Iterable[Path], size: int) -> Iterator[List[Path]]:
+    it = iter(items)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+class ModuleRegistry:
+    """ Per-run registry of module summaries, keyed by filepath.
+        Each file is read and parsed at most once per run,
+        and not at all if an unchanged summary is found in the (optional) persistent cache.
+    """
+    def __init__(self, 
+                 cache: Optional["AnalysisCache"] = None, 
+                 jobs: int = 1,
+                 parser: str = "ast"
+                 ) -> None:
+        self.cache = cache
+        self.parser = parser
+        # number of worker processes used for parsing, 0 means one per CPU
+        self.jobs = jobs or os.cpu_count() or 1
+        self._summaries: Dict[Path, ModuleSummary] = {}
+        # number of files parsed, and found in the cache, during this run
+        self.n_parsed = 0
+        self.n_cached = 0
+
+    def __contains__(self, filepath: Path) -> bool:
+        return filepath in self._summaries
+
+    def _add(self, filepath: Path, summary: ModuleSummary) -> None:
+        self._summaries[filepath] = summary
+        if self.cache:
+            self.cache.put(filepath, summary)
+
+    def load(self, filepaths: Iterable[Path]) -> List[Path]:
+        """ Summarize all files not yet in the registry, returns the given filepaths as a list.
+            Files are consumed as they come, so parsing can start while a generator is still discovering files.
+            Files missing from the cache are parsed in worker processes, if more than one job is allowed.
+        """
+        seen: List[Path] = []
+        def to_parse() -> Iterator[Path]:
+            for filepath in filepaths:
+                seen.append(filepath)
+                if filepath in self._summaries:
+                    continue
+                summary = self.cache.get(filepath) if self.cache else None
+                if summary is None:
+                    yield filepath
+                else:
+                    self._summaries[filepath] = summary
+                    self.n_cached += 1
+
+        if self.jobs > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                # batches are sent to the workers as soon as they are full
+                futures = [(batch, executor.submit(summarize_files, batch, parser=self.parser))
+                           for batch in _batched(to_parse(), CHUNKSIZE)]
+                # collected in submission order, so the registry is filled deterministically
+                for batch, future in futures:
+                    for filepath, summary in zip(batch, future.result()):
+                        self._add(filepath, summary)
+                    self.n_parsed += len(batch)
+        else:
+            for filepath in to_parse():
+                self._add(filepath, summarize_file(filepath, parser=self.parser))
+                self.n_parsed += 1
+        return seen
+
+    def reload(self, filepaths: Iterable[Path]) -> List[Path]:
+        """ Summarize files again, e.g. because they were added or modified.
+            A file that can't be parsed keeps its last summary, or gets an empty one if it has none,
+            so the rest of the project can still be drawn. Returns the files that couldn't be parsed.
+        """
+        failed = []
+        for filepath in filepaths:
+            try:
+                summary = self.cache.get(filepath) if self.cache else None
+                if summary is None:
+                    summary = summarize_file(filepath, parser=self.parser)
+                    self.n_parsed += 1
+                else:
+                    self.n_cached += 1
+            except PARSE_ERRORS + (OSError,) as e:
+                logging.warning(f"Cannot parse '{filepath}', keeping its last analysis: {e}")
+                self._summaries.setdefault(filepath, empty_summary())
+                failed.append(filepath)
+                continue
+            self._add(filepath, summary)
+        return failed
+
+    def add(self, filepath: Path, summary: ModuleSummary) -> None:
+        """ Add the summary of a file that was summarized elsewhere, e.g. from its contents in git.
+        """
+        self._add(filepath, summary)
+
+    def discard(self, filepaths: Iterable[Path]) -> None:
+        """ Forget the summaries of files, e.g. because they were modified.
+        """
+        filepaths = list(filepaths)
+        for filepath in filepaths:
+            self._summaries.pop(filepath, None)
+        if self.cache:
+            self.cache.discard(filepaths)
+
+    def get(self, filepath: Path) -> ModuleSummary:
+        if filepath not in self._summaries:
+            self.load([filepath])
+        return self._summaries[filepath]
@@ -1,4 +1,10 @@
 
 
-from .filtering import filter_links, filter_nodes
-from .creator import create
+from .graph import ProjectGraph
+from .filtering import filter_links, filter_nodes, filter_paths
+from .creator import create, update
+from .collapse import GRANULARITIES, collapse
+from .metrics import add_import_closures, add_import_times, import_closures
+from .compact import CompactGraph
+from .reduce import bundle_imports, reduce_imports, transitive_reduction
+from .serialize import load_graph, save_graph
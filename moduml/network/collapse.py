@@ -0,0 +1,110 @@
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..module.interface import ModuleInterface
+from .compact import NODE_TYPES, CompactGraph, Link
+from .graph import ProjectGraph
+
+
+GRANULARITIES = ["file", "package"]
+
+
+def _target(filepath: Path, project_path: Path, depth: Optional[int], granularity: str) -> Path:
+    """ The node a file is contracted into: the file itself, its directory, or its ancestor directory at depth.
+    """
+    dir_depth = len(filepath.parent.relative_to(project_path).parts)
+    if depth is not None and dir_depth >= depth:
+        return filepath.parents[dir_depth - depth]
+    if granularity == "package":
+        return filepath.parent
+    return filepath
+
+
+def _interface_counts(module_interface: Optional[ModuleInterface]) -> Dict[str, int]:
+    if module_interface is None:
+        return dict(classes=0, functions=0, variables=0)
+    return dict(classes=len(module_interface.class_defs),
+                functions=len(module_interface.function_defs),
+                variables=len(module_interface.single_assignments)
+                )
+
+
+def collapse(g: Union[ProjectGraph, CompactGraph],
+             project_path: Path,
+             depth: Optional[int] = None,
+             granularity: str = "file"
+             ) -> CompactGraph:
+    """ Returns a smaller graph, with file nodes contracted into their directory.
+        depth: files in directories at this depth (project_path is depth 0) or deeper are contracted
+               into their ancestor directory at this depth, and the directories below it are dropped.
+        granularity: 'package' contracts every file into its directory, 'file' keeps files (above depth).
+        A contracted directory becomes a 'collapsed' node, with '_counts' of its modules, classes, functions and variables.
+        Import links between the same nodes are merged into one, with the number of merged links as its weight,
+        and the most eager kind of the merged links. Import links are kept apart from hierarchy links,
+        so e.g. a package importing its sub package keeps its import link.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity cannot take value: {granularity}")
+    if not isinstance(g, CompactGraph):
+        g = CompactGraph.from_graph(g)
+    file_nodes = g.nodes_of_type("file")
+    target: Dict[int, int] = {}
+    for f in file_nodes:
+        t = g.node_id(_target(g.path(f), project_path, depth, granularity))
+        target[f] = f if t is None else t
+
+    # rolled up counts of each collapsed directory
+    interfaces: Dict[int, ModuleInterface] = g.attributes.get("_interface", {})
+    counts: Dict[int, Dict[str, int]] = {}
+    for f in file_nodes:
+        t = target[f]
+        if t == f:
+            continue
+        c = counts.setdefault(t, dict(modules=0, classes=0, functions=0, variables=0))
+        c["modules"] += 1
+        for k,v in _interface_counts(interfaces.get(f)).items():
+            c[k] += v
+
+    def is_kept(n: int) -> bool:
+        node_type = g.node_type(n)
+        if node_type == "file":
+            return target[n] == n
+        if node_type == "dir":
+            return depth is None or len(g.path(n).relative_to(project_path).parts) <= depth
+        return True
+
+    # nodes, in the same order as the original graph
+    new_id: Dict[int, int] = {}
+    for n in range(len(g)):
+        if n in counts or is_kept(n):
+            new_id[n] = len(new_id)
+    names = [g.names[n] for n in new_id]
+    collapsed_code = NODE_TYPES.index("collapsed")
+    types = array("B", (collapsed_code if n in counts else g.types[n] for n in new_id))
+    attributes: Dict[str, Dict[int, Any]] = {k: {new_id[n]: v for n,v in values.items() if n in new_id and n not in counts}
+                                             for k,values in g.attributes.items()}
+    file_code = NODE_TYPES.index("file")
+    attributes["_counts"] = {new_id[n]: c for n,c in counts.items()}
+    attributes["_is_package"] = {}
+    for n in counts:
+        init = g.node_id(g.path(n) / "__init__.py")
+        attributes["_is_package"][new_id[n]] = init is not None and g.types[init] == file_code
+
+    # hierarchy links between the remaining nodes
+    hierarchy_links: List[Link] = [(new_id[src], new_id[dst], kind, weight) for src,dst,kind,weight in g.links["hierarchy"]
+                                   if src in new_id and dst in new_id]
+
+    # merged import links, in order of the first merged link
+    merged: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    for src,dst,kind,weight in g.links["import"]:
+        src_t, dst_t = target.get(src, src), target.get(dst, dst)
+        if src_t == dst_t:
+            # imports within a collapsed directory
+            continue
+        merged_kind, merged_weight = merged.get((src_t, dst_t), (kind, 0))
+        # lowest index, i.e. most eager kind
+        merged[(src_t, dst_t)] = (min(merged_kind, kind), merged_weight + weight)
+    import_links: List[Link] = [(new_id[src], new_id[dst], kind, weight) for (src, dst),(kind, weight) in merged.items()]
+
+    return CompactGraph(names, types, attributes, {"hierarchy": hierarchy_links, "import": import_links}, **g.graph)
@@ -0,0 +1,209 @@
+""" Compact, integer indexed form of a project graph, for the stages that draw a view of it.
+    Nodes are ids into a string table of their (posix) paths, node types are a byte array,
+    and the links of each type are held in compressed sparse row (CSR) arrays.
+    Path objects are only made for the nodes that are drawn, and networkx graphs only on demand.
+"""
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import copy
+import itertools
+
+import networkx as nx
+
+from ..module.imports import IMPORT_KINDS
+from .filtering import match_parts
+from .graph import ProjectGraph
+from .metrics import STARTUP_IMPORT_KINDS, closure_counts
+
+
+NODE_TYPES = ["file", "dir", "ext_package", "collapsed"]
+LINK_TYPES = ["hierarchy", "import"]
+
+# (src, dst, kind, weight), kind is an index into IMPORT_KINDS
+Link = Tuple[int, int, int, int]
+
+
+class Links:
+    """ The links of one type in CSR form: the links of node i are at offsets[i]:offsets[i+1]
+        of the targets, kinds and weights arrays, in the order they were given.
+    """
+    def __init__(self, n_nodes: int, links: Iterable[Link] = ()) -> None:
+        links = list(links)
+        counts = [0] * (n_nodes + 1)
+        for src,_,_,_ in links:
+            counts[src + 1] += 1
+        self.offsets = array("l", itertools.accumulate(counts))
+        self.targets = array("l", [0]) * len(links)
+        self.kinds = array("B", [0]) * len(links)
+        self.weights = array("l", [0]) * len(links)
+        # counting sort by src, stable so each node keeps the order of its links
+        position = list(self.offsets[:-1])
+        for src,dst,kind,weight in links:
+            i = position[src]
+            self.targets[i], self.kinds[i], self.weights[i] = dst, kind, weight
+            position[src] += 1
+        # sources of each node's incoming links, made on first use
+        self._reverse: Optional[Tuple[array, array]] = None
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def __iter__(self) -> Iterator[Link]:
+        offsets = self.offsets
+        for src in range(len(offsets) - 1):
+            for i in range(offsets[src], offsets[src + 1]):
+                yield src, self.targets[i], self.kinds[i], self.weights[i]
+
+    def successors(self, n: int) -> array:
+        return self.targets[self.offsets[n]:self.offsets[n + 1]]
+
+    def predecessors(self, n: int) -> array:
+        if self._reverse is None:
+            reverse = Links(len(self.offsets) - 1, ((dst, src, 0, 1) for src,dst,_,_ in self))
+            self._reverse = (reverse.offsets, reverse.targets)
+        offsets, sources = self._reverse
+        return sources[offsets[n]:offsets[n + 1]]
+
+
+class CompactGraph:
+    """ A read-only project graph, with the nodes and links of a ProjectGraph made by network.create.
+        Node ids follow the order of the nodes in the original graph, and links keep their order too,
+        so a view drawn from either graph is the same.
+        Node attributes (other than '_type') are kept per attribute, for the nodes that have them.
+    """
+    def __init__(self,
+                 names: List[str],
+                 types: array,
+                 attributes: Dict[str, Dict[int, Any]],
+                 links: Dict[str, Iterable[Link]],
+                 **graph_attributes
+                 ) -> None:
+        self.graph: Dict[str, Any] = graph_attributes
+        # string table: the posix path of each node
+        self.names = names
+        self.ids: Dict[str, int] = {name: i for i,name in enumerate(names)}
+        # index into NODE_TYPES, of each node
+        self.types = types
+        # attribute name -> node -> value
+        self.attributes = attributes
+        self.links: Dict[str, Links] = {t: Links(len(names), links.get(t, ())) for t in LINK_TYPES}
+        self._paths: Dict[int, Path] = {}
+
+    @classmethod
+    def from_graph(cls, g: nx.DiGraph) -> "CompactGraph":
+        """ The compact form of a networkx graph, with Path nodes and '_type', '_kind' and '_weight' attributes.
+        """
+        ids: Dict[Any, int] = {n: i for i,n in enumerate(g.nodes)}
+        types = array("B", [0]) * len(ids)
+        attributes: Dict[str, Dict[int, Any]] = {}
+        for n,attr in g.nodes(data=True):
+            i = ids[n]
+            for k,v in attr.items():
+                if k == "_type":
+                    types[i] = NODE_TYPES.index(v)
+                else:
+                    attributes.setdefault(k, {})[i] = v
+        links: Dict[str, List[Link]] = {t: [] for t in LINK_TYPES}
+        for src,succ in g.succ.items():
+            for dst,attr in succ.items():
+                kind = IMPORT_KINDS.index(attr.get("_kind", "eager"))
+                links[attr["_type"]].append((ids[src], ids[dst], kind, attr.get("_weight", 1)))
+        return cls([n.as_posix() for n in g.nodes], types, attributes, links, **g.graph)
+
+    def to_networkx(self) -> ProjectGraph:
+        """ The graph as a ProjectGraph, with Path nodes.
+        """
+        g = ProjectGraph(**self.graph)
+        for i in range(len(self.names)):
+            attr = {k: values[i] for k,values in self.attributes.items() if i in values}
+            g.add_node(self.path(i), _type=self.node_type(i), **attr)
+        for link_type in LINK_TYPES:
+            for src,dst,kind,weight in self.links[link_type]:
+                attr = {"_kind": IMPORT_KINDS[kind]} if link_type == "import" else {}
+                if weight != 1:
+                    attr["_weight"] = weight
+                g.add_edge(self.path(src), self.path(dst), _type=link_type, **attr)
+        return g
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def number_of_links(self) -> int:
+        return sum(len(links) for links in self.links.values())
+
+    def node_id(self, path: Path) -> Optional[int]:
+        return self.ids.get(path.as_posix())
+
+    def path(self, n: int) -> Path:
+        """ Path of a node, made on first use.
+        """
+        p = self._paths.get(n)
+        if p is None:
+            p = self._paths[n] = Path(self.names[n])
+        return p
+
+    def node_type(self, n: int) -> str:
+        return NODE_TYPES[self.types[n]]
+
+    def node_attribute(self, n: int, name: str, default: Any = None) -> Any:
+        return self.attributes.get(name, {}).get(n, default)
+
+    def nodes_of_type(self, node_type: str) -> List[int]:
+        code = NODE_TYPES.index(node_type)
+        return [i for i,t in enumerate(self.types) if t == code]
+
+    def with_attributes(self, **attributes: Dict[int, Any]) -> "CompactGraph":
+        """ The same graph with more node attributes (name -> node -> value).
+            The nodes and links are shared with this graph, which isn't changed.
+        """
+        g = copy.copy(self)
+        g.attributes = {**self.attributes, **attributes}
+        return g
+
+    def subgraph(self,
+                 keep_nodes: Optional[Iterable[bool]] = None,
+                 keep_link: Optional[Callable[[str, Link], bool]] = None
+                 ) -> "CompactGraph":
+        """ A new graph with the nodes where keep_nodes is true, and the links between them of which
+            keep_link(link type, link) is true. Node ids are renumbered, in the same order.
+        """
+        keep = list(keep_nodes) if keep_nodes is not None else [True] * len(self.names)
+        new_id: Dict[int, int] = {}
+        for i,k in enumerate(keep):
+            if k:
+                new_id[i] = len(new_id)
+        names = [self.names[i] for i in new_id]
+        types = array("B", (self.types[i] for i in new_id))
+        attributes = {k: {new_id[i]: v for i,v in values.items() if i in new_id} for k,values in self.attributes.items()}
+        links: Dict[str, List[Link]] = {}
+        for link_type,type_links in self.links.items():
+            links[link_type] = [(new_id[src], new_id[dst], kind, weight) for src,dst,kind,weight in type_links
+                                if src in new_id and dst in new_id and (keep_link is None or keep_link(link_type, (src, dst, kind, weight)))]
+        sub = CompactGraph(names, types, attributes, links, **self.graph)
+        sub._paths = {new_id[i]: p for i,p in self._paths.items() if i in new_id}
+        return sub
+
+    def filter_paths(self, project_path: Path, pattern: str) -> Set[int]:
+        """ Returns the file and dir nodes matching a glob pattern, same as network.filter_paths.
+        """
+        pattern_parts = ("**",) + tuple(p for p in Path(pattern).parts if p != ".")
+        root = project_path.as_posix()
+        prefix = "" if root == "." else root + "/"
+        file_code, dir_code = NODE_TYPES.index("file"), NODE_TYPES.index("dir")
+        matches = set()
+        for i,name in enumerate(self.names):
+            t = self.types[i]
+            if t != file_code and t != dir_code:
+                continue
+            parts = () if name == root else tuple(name[len(prefix):].split("/"))
+            if match_parts(parts, pattern_parts, is_dir=(t == dir_code)):
+                matches.add(i)
+        return matches
+
+    def import_closures(self) -> Dict[int, Tuple[int, int]]:
+        """ See network.import_closures
+        """
+        startup_kinds = {IMPORT_KINDS.index(k) for k in STARTUP_IMPORT_KINDS}
+        import_links = ((src, dst) for src,dst,kind,_ in self.links["import"] if kind in startup_kinds)
+        return closure_counts(self.nodes_of_type("file"), self.nodes_of_type("ext_package"), import_links)
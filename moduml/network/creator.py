@@ -1,20 +1,27 @@
 
 from pathlib import Path
-from typing import Dict, List, Tuple
-import astroid
-import itertools
+from typing import List, Optional
 
-import networkx as nx
+from ..module.imports import get_module_import_kinds
+from ..module.index import ModuleIndex
+from ..module.registry import ModuleRegistry, ModuleSummary
+from .graph import ProjectGraph
 
-from ..module.imports import get_module_imports
-from . import utils
 
-
-def create(filepaths: List[Path], project_path: Path) -> nx.DiGraph:
+def create(filepaths: List[Path], 
+           project_path: Path, 
+           registry: Optional[ModuleRegistry] = None,
+           index: Optional[ModuleIndex] = None
+           ) -> ProjectGraph:
     """ Create a network/graph with file and dir nodes,
         with directory tree hierarchy links and module import links.
+        File nodes hold their module interface in the '_interface' attribute.
+        Imports are resolved against an index of the given filepaths, i.e. without filesystem access.
+        The project path is kept in the graph attribute 'project_path'.
     """
-    g = nx.DiGraph()
+    if registry is None:
+        registry = ModuleRegistry()
+    g = ProjectGraph(project_path=project_path)
 
     # add hierarchy links
     # ex: dir -(hierarchy)-> dir/subdir
@@ -28,30 +35,87 @@ def create(filepaths: List[Path], project_path: Path) -> nx.DiGraph:
     filenodes: List[Path] = [n for n in g.nodes if n.suffix == ".py"]
     dirnodes: List[Path] = [n for n in g.nodes if not n.suffix]
 
-    for fn in filenodes:
-        g.nodes[fn]["_type"] = "file"
-
-    for dn in dirnodes:
-        g.nodes[dn]["_type"] = "dir"
+    g.add_nodes_from(filenodes, _type="file")
+    g.add_nodes_from(dirnodes, _type="dir")
 
     # add import links
+    if index is None:
+        index = ModuleIndex(filenodes, project_path=project_path)
+    registry.load(filenodes)
     for filepath in filenodes:
-        module_ast = utils.parse_python_file(filepath)
-        internal_imports, external_imports = get_module_imports(module_path=filepath, 
-                                                                module_ast=module_ast, 
-                                                                project_path=project_path
-                                                                )
-        # add links to internal modules
-        if internal_imports:
-            edges_internal = itertools.product([filepath], internal_imports)
-            g.add_edges_from(edges_internal, _type="import")
-
-        # add external nodes, with external module type
-        if external_imports:
-            g.add_nodes_from(external_imports, _type="ext_package")
-            
-            # add links to external nodes
-            edges_external = itertools.product([filepath], external_imports)
-            g.add_edges_from(edges_external, _type="import")
+        _add_import_links(g, filepath=filepath, summary=registry.get(filepath), project_path=project_path, index=index)
 
     return g
+
+
+def _add_import_links(g: ProjectGraph, 
+                      filepath: Path, 
+                      summary: ModuleSummary, 
+                      project_path: Path, 
+                      index: ModuleIndex
+                      ) -> None:
+    """ Add the module interface of a file node, and its import links to internal modules and external packages.
+        Import links hold the kind of import (eager, guarded, typing, deferred) in the '_kind' attribute.
+    """
+    g.nodes[filepath]["_interface"] = summary.interface
+    internal_imports, external_imports = get_module_import_kinds(module_path=filepath, 
+                                                                 imports=summary.imports, 
+                                                                 project_path=project_path,
+                                                                 index=index
+                                                                 )
+    # add links to internal modules
+    if internal_imports:
+        edges_internal = [(filepath, dst, {"_kind": kind}) for dst,kind in internal_imports.items()]
+        g.add_edges_from(edges_internal, _type="import")
+
+    # add external nodes, with external module type
+    if external_imports:
+        g.add_nodes_from(external_imports, _type="ext_package")
+        
+        # add links to external nodes
+        edges_external = [(filepath, dst, {"_kind": kind}) for dst,kind in external_imports.items()]
+        g.add_edges_from(edges_external, _type="import")
+
+
+def update(g: ProjectGraph,
+           project_path: Path,
+           added: List[Path],
+           modified: List[Path],
+           removed: List[Path],
+           registry: ModuleRegistry
+           ) -> None:
+    """ Patch a graph made by create, after files were added, modified or removed.
+        Only the changed files are re-analysed. If files were added or removed, 
+        the imports of all files are re-resolved, since an import may now point to a different file.
+        A file that can't be parsed keeps its last analysis, see ModuleRegistry.reload.
+    """
+    registry.discard(removed)
+    registry.reload(added + modified)
+
+    # removed files, and the dirs and external packages left without any links
+    g.remove_nodes_from(removed)
+    parents = {p for filepath in removed for p in filepath.parents}
+    for d in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+        if d in g and g.nodes[d].get("_type") == "dir" and not any(g.successors(d)):
+            g.remove_node(d)
+
+    # added files, same hierarchy links as in create
+    for filepath in added:
+        g.add_edge(filepath.parent, filepath, _type="hierarchy")
+        if filepath.parent != project_path:
+            g.add_edge(filepath.parents[1], filepath.parents[0], _type="hierarchy")
+        g.add_node(filepath, _type="file")
+        for d in filepath.parents[:2]:
+            if d in g and "_type" not in g.nodes[d]:
+                g.add_node(d, _type="dir")
+
+    # re-link imports
+    filenodes: List[Path] = g.nodes_of_type("file")
+    index = ModuleIndex(filenodes, project_path=project_path)
+    relink = filenodes if (added or removed) else modified
+    registry.load(relink)
+    for filepath in relink:
+        g.remove_edges_from([(filepath, dst) for dst,attr in g.succ[filepath].items() if attr["_type"] == "import"])
+        _add_import_links(g, filepath=filepath, summary=registry.get(filepath), project_path=project_path, index=index)
+
+    g.remove_nodes_from([n for n in g.nodes_of_type("ext_package") if not any(g.predecessors(n))])
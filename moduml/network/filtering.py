@@ -1,14 +1,23 @@
 from pathlib import Path
-from typing import Dict, List, Tuple
-import astroid
-import itertools
+from typing import Dict, List, Set, Tuple
+from fnmatch import fnmatchcase
 
 import networkx as nx
 
+from .graph import ProjectGraph
+
+
+def _has_type_index(network: nx.DiGraph) -> bool:
+    # views (e.g. subgraphs) of a ProjectGraph don't maintain an index of their own
+    return isinstance(network, ProjectGraph) and not nx.is_frozen(network)
+
 
 def filter_nodes(network: nx.DiGraph, node_type: str, data: bool = True) -> List[Tuple[Path, Dict]]:
+    """ Returns the nodes of a given type, optionally with their data.
     """
-    """
+    if _has_type_index(network):
+        nodes = network.nodes_of_type(node_type)
+        return [(n, network.nodes[n]) for n in nodes] if data else nodes
     if data:
         return [(n,attr) for n,attr in network.nodes(data=True) if attr["_type"] == node_type]
     else:
@@ -16,6 +25,37 @@ def filter_nodes(network: nx.DiGraph, node_type: str, data: bool = True) -> List
 
 
 def filter_links(network: nx.DiGraph, link_type: str) -> List[Tuple[Path, Path, Dict]]:
+    """ Returns the links/edges (with data) of a given type.
     """
+    if _has_type_index(network):
+        return network.edges_of_type(link_type)
+    return [(src,dst,attr) for src,dst,attr in network.edges(data=True) if attr["_type"] == link_type]
+
+
+def match_parts(parts: Tuple[str, ...], pattern_parts: Tuple[str, ...], is_dir: bool) -> bool:
+    """ Match path parts against glob pattern parts, where '**' matches zero or more directories.
+    """
+    if not pattern_parts:
+        return not parts
+    head, rest = pattern_parts[0], pattern_parts[1:]
+    if head == "**":
+        # '**' only matches directories, i.e. never the name of a file
+        max_consumed = len(parts) if is_dir else len(parts) - 1
+        return any(match_parts(parts[i:], rest, is_dir) for i in range(max_consumed + 1))
+    return bool(parts) and fnmatchcase(parts[0], head) and match_parts(parts[1:], rest, is_dir)
+
+
+def filter_paths(network: nx.DiGraph, project_path: Path, pattern: str) -> Set[Path]:
+    """ Returns the file and dir nodes matching a glob pattern.
+        Same result as project_path.rglob(pattern), but matched against the already discovered nodes,
+        i.e. without walking the filesystem again.
     """
-    return [(src,dst,attr) for src,dst,attr in network.edges(data=True) if attr["_type"] == link_type]
\ No newline at end of file
+    pattern_parts = ("**",) + tuple(p for p in Path(pattern).parts if p != ".")
+    matches = set()
+    for n,attr in network.nodes(data=True):
+        if attr["_type"] not in ("file", "dir"):
+            continue
+        parts = n.relative_to(project_path).parts
+        if match_parts(parts, pattern_parts, is_dir=(attr["_type"] == "dir")):
+            matches.add(n)
+    return matches
@@ -0,0 +1,167 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import networkx as nx
+
+
+Node = Hashable
+
+
+class ProjectGraph(nx.DiGraph):
+    """ A nx.DiGraph that keeps an index of its nodes and edges by their '_type' attribute.
+        The index is kept in step with add_*/remove_* calls, so that e.g. all file nodes or all import links
+        are found in O(result) instead of O(graph).
+        OBS: the '_type' of a node/edge must be set via add_node(s)/add_edge(s), not by assigning the attribute directly.
+    """
+    def __init__(self, incoming_graph_data=None, **attr) -> None:
+        # type -> nodes (dict as an ordered set)
+        self._nodes_by_type: Dict[str, Dict[Node, None]] = {}
+        self._node_type: Dict[Node, str] = {}
+        # type -> src -> dsts
+        self._edges_by_type: Dict[str, Dict[Node, Dict[Node, None]]] = {}
+        self._edge_type: Dict[Tuple[Node, Node], str] = {}
+        # insertion order of nodes, to return results in the same order as iterating the graph
+        self._node_order: Dict[Node, int] = {}
+        self._node_counter = 0
+        super().__init__(incoming_graph_data, **attr)
+
+    # --- index maintenance
+
+    def _track_node(self, n: Node) -> None:
+        if n not in self._node_order:
+            self._node_order[n] = self._node_counter
+            self._node_counter += 1
+
+    def _index_node(self, n: Node) -> None:
+        self._track_node(n)
+        new_type: Optional[str] = self._node[n].get("_type")
+        old_type: Optional[str] = self._node_type.get(n)
+        if new_type == old_type:
+            return
+        if old_type is not None:
+            del self._nodes_by_type[old_type][n]
+            del self._node_type[n]
+        if new_type is not None:
+            self._nodes_by_type.setdefault(new_type, {})[n] = None
+            self._node_type[n] = new_type
+
+    def _unindex_node(self, n: Node) -> None:
+        for succ in self._succ[n]:
+            self._unindex_edge(n, succ)
+        for pred in self._pred[n]:
+            self._unindex_edge(pred, n)
+        old_type = self._node_type.pop(n, None)
+        if old_type is not None:
+            del self._nodes_by_type[old_type][n]
+        self._node_order.pop(n, None)
+
+    def _index_edge(self, u: Node, v: Node) -> None:
+        self._track_node(u)
+        self._track_node(v)
+        new_type: Optional[str] = self._adj[u][v].get("_type")
+        old_type: Optional[str] = self._edge_type.get((u, v))
+        if new_type == old_type:
+            return
+        if old_type is not None:
+            self._unindex_edge(u, v)
+        if new_type is None:
+            return
+        self._edge_type[(u, v)] = new_type
+        dsts = self._edges_by_type.setdefault(new_type, {}).setdefault(u, {})
+        if next(reversed(self._succ[u])) == v:
+            # newest edge of u
+            dsts[v] = None
+        else:
+            # a re-typed edge keeps its position among the edges of u, so rebuild in adjacency order
+            self._edges_by_type[new_type][u] = {d: None for d in self._succ[u] if self._edge_type.get((u, d)) == new_type}
+
+    def _unindex_edge(self, u: Node, v: Node) -> None:
+        old_type = self._edge_type.pop((u, v), None)
+        if old_type is None:
+            return
+        dsts = self._edges_by_type[old_type][u]
+        del dsts[v]
+        if not dsts:
+            del self._edges_by_type[old_type][u]
+
+    # --- nx.DiGraph mutators
+
+    def add_node(self, node_for_adding, **attr) -> None:
+        super().add_node(node_for_adding, **attr)
+        self._index_node(node_for_adding)
+
+    def add_nodes_from(self, nodes_for_adding, **attr) -> None:
+        nodes = list(nodes_for_adding)
+        super().add_nodes_from(nodes, **attr)
+        for n in nodes:
+            try:
+                n in self._node
+            except TypeError:
+                # (node, attr dict) tuple
+                n = n[0]
+            self._index_node(n)
+
+    def remove_node(self, n) -> None:
+        if n in self._node:
+            self._unindex_node(n)
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes) -> None:
+        nodes = list(nodes)
+        for n in nodes:
+            if n in self._node:
+                self._unindex_node(n)
+        super().remove_nodes_from(nodes)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr) -> None:
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self._index_edge(u_of_edge, v_of_edge)
+
+    def add_edges_from(self, ebunch_to_add, **attr) -> None:
+        # one edge at a time, so each edge is indexed while it is the newest edge of its source
+        for e in list(ebunch_to_add):
+            if len(e) == 3:
+                u, v, dd = e
+                self.add_edge(u, v, **{**attr, **dd})
+            elif len(e) == 2:
+                u, v = e
+                self.add_edge(u, v, **attr)
+            else:
+                raise nx.NetworkXError(f"Edge tuple {e} must be a 2-tuple or 3-tuple.")
+
+    def remove_edge(self, u, v) -> None:
+        super().remove_edge(u, v)
+        self._unindex_edge(u, v)
+
+    def remove_edges_from(self, ebunch) -> None:
+        edges = list(ebunch)
+        super().remove_edges_from(edges)
+        for e in edges:
+            self._unindex_edge(e[0], e[1])
+
+    def clear(self) -> None:
+        super().clear()
+        self._nodes_by_type.clear()
+        self._node_type.clear()
+        self._edges_by_type.clear()
+        self._edge_type.clear()
+        self._node_order.clear()
+
+    def clear_edges(self) -> None:
+        super().clear_edges()
+        self._edges_by_type.clear()
+        self._edge_type.clear()
+
+    # --- queries
+
+    def nodes_of_type(self, node_type: str) -> List[Node]:
+        """ Returns the nodes of a type, in graph order.
+        """
+        nodes = self._nodes_by_type.get(node_type, {})
+        return sorted(nodes, key=self._node_order.__getitem__)
+
+    def edges_of_type(self, edge_type: str) -> List[Tuple[Node, Node, Dict[str, Any]]]:
+        """ Returns the edges (with data) of a type, in graph order.
+        """
+        edges = self._edges_by_type.get(edge_type, {})
+        srcs = sorted(edges, key=self._node_order.__getitem__)
+        return [(src, dst, self._adj[src][dst]) for src in srcs for dst in edges[src]]
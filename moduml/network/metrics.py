@@ -0,0 +1,119 @@
+""" Import metrics of file nodes, i.e. what importing a module costs at startup.
+"""
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+import re
+
+import networkx as nx
+
+from .filtering import filter_links, filter_nodes
+
+
+# Kinds of imports executed when a module is imported, i.e. not the deferred (in a function) and typing ones.
+STARTUP_IMPORT_KINDS = ("eager", "guarded")
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def import_closures(g: nx.DiGraph) -> Dict[Path, Tuple[int, int]]:
+    """ Returns the size of the transitive import closure of each file, as (internal modules, external packages).
+        Only the imports executed at import time are followed, see STARTUP_IMPORT_KINDS.
+        The file itself isn't counted. Import cycles are condensed into single nodes first,
+        and the closures are then collected in reverse topological order as bitsets, i.e. in O(nodes * edges / 64).
+    """
+    import_links = [(src, dst) for src,dst,attr in filter_links(g, "import") if attr.get("_kind", "eager") in STARTUP_IMPORT_KINDS]
+    return closure_counts(filter_nodes(g, "file", data=False), filter_nodes(g, "ext_package", data=False), import_links)
+
+
+def closure_counts(file_nodes: List[Hashable], 
+                   ext_nodes: List[Hashable], 
+                   import_links: Iterable[Tuple[Hashable, Hashable]]
+                   ) -> Dict[Hashable, Tuple[int, int]]:
+    """ import_closures of any kind of nodes, e.g. the integer ids of a CompactGraph.
+    """
+    file_bit = {n: 1 << i for i,n in enumerate(file_nodes)}
+    ext_bit = {n: 1 << i for i,n in enumerate(ext_nodes)}
+
+    imports = nx.DiGraph()
+    imports.add_nodes_from(file_nodes)
+    ext_imports: Dict[Hashable, int] = {}
+    for src,dst in import_links:
+        if src not in file_bit:
+            continue
+        if dst in file_bit:
+            imports.add_edge(src, dst)
+        elif dst in ext_bit:
+            ext_imports[src] = ext_imports.get(src, 0) | ext_bit[dst]
+    condensed = nx.condensation(imports)
+
+    internal: Dict[int, int] = {}
+    external: Dict[int, int] = {}
+    for c in reversed(list(nx.topological_sort(condensed))):
+        members = condensed.nodes[c]["members"]
+        int_bits, ext_bits = 0, 0
+        for n in members:
+            int_bits |= file_bit[n]
+            ext_bits |= ext_imports.get(n, 0)
+        for succ in condensed.succ[c]:
+            int_bits |= internal[succ]
+            ext_bits |= external[succ]
+        internal[c], external[c] = int_bits, ext_bits
+
+    mapping = condensed.graph["mapping"]
+    return {n: (_popcount(internal[mapping[n]]) - 1, _popcount(external[mapping[n]])) for n in file_nodes}
+
+
+def add_import_closures(g: nx.DiGraph) -> None:
+    """ Set the '_closure' attribute of each file node, see import_closures.
+    """
+    for n,closure in import_closures(g).items():
+        g.nodes[n]["_closure"] = closure
+
+
+# ex: "import time:       301 |       1021 |   numpy.core"
+_re_importtime = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(log: str) -> Dict[str, int]:
+    """ Returns the cumulative import time (in microseconds) of each module in the output of 'python -X importtime'.
+    """
+    times = {}
+    for line in log.splitlines():
+        match = _re_importtime.match(line)
+        if match:
+            _, cumulative, _, module = match.groups()
+            # a module can be listed more than once, e.g. once per interpreter run in the log
+            times[module] = max(times.get(module, 0), int(cumulative))
+    return times
+
+
+def _module_name(filepath: Path, root: Path) -> str:
+    parts = list(filepath.relative_to(root).with_suffix("").parts)
+    if parts and parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def add_import_times(g: nx.DiGraph, project_path: Path, log: str) -> int:
+    """ Set the '_import_time' attribute (cumulative, in microseconds) of the file and external package nodes
+        found in a 'python -X importtime' log. Module names are matched relative to the project directory,
+        or to its parent directory (if the project directory is itself a package).
+        Returns the number of nodes matched.
+    """
+    times = parse_importtime(log)
+    matched = 0
+    for n in filter_nodes(g, "file", data=False):
+        for root in (project_path, project_path.parent):
+            t: Optional[int] = times.get(_module_name(n, root))
+            if t is not None:
+                g.nodes[n]["_import_time"] = t
+                matched += 1
+                break
+    for n in filter_nodes(g, "ext_package", data=False):
+        t = times.get(n.as_posix())
+        if t is not None:
+            g.nodes[n]["_import_time"] = t
+            matched += 1
+    return matched
@@ -0,0 +1,91 @@
+""" Fewer import links to draw: transitive reduction, and bundling of links into directory links.
+"""
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from .compact import CompactGraph, Link
+
+
+def transitive_reduction(nodes: List[Hashable], links: Iterable[Tuple[Hashable, Hashable]]) -> Set[Tuple[Hashable, Hashable]]:
+    """ Returns the links kept by a transitive reduction, i.e. without the links to nodes that are reached anyway.
+        Cycles are condensed into single nodes first: the links within a cycle are all kept,
+        and the links between two cycles (or nodes) are kept if the link between them is kept in the reduced DAG.
+        The nodes reached from each node are collected as bitsets, in reverse topological order.
+    """
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(links)
+    condensed = nx.condensation(graph)
+    mapping = condensed.graph["mapping"]
+    order = list(nx.topological_sort(condensed))
+    position = {c: i for i,c in enumerate(order)}
+
+    # components reached from a component, incl. itself
+    reached: Dict[int, int] = {}
+    kept: Set[Tuple[int, int]] = set()
+    for c in reversed(order):
+        covered = 0
+        # a successor reached via another successor comes after it in topological order
+        for succ in sorted(condensed.succ[c], key=position.__getitem__):
+            if not (covered >> position[succ]) & 1:
+                kept.add((c, succ))
+                covered |= reached[succ]
+        reached[c] = covered | (1 << position[c])
+
+    return {(src,dst) for src,dst in graph.edges if mapping[src] == mapping[dst] or (mapping[src], mapping[dst]) in kept}
+
+
+def _module_nodes(g: CompactGraph) -> Set[int]:
+    return set(g.nodes_of_type("file")) | set(g.nodes_of_type("collapsed"))
+
+
+def reduce_imports(g: CompactGraph) -> CompactGraph:
+    """ Returns a graph with the import links between modules (files and collapsed directories) transitively reduced,
+        see transitive_reduction. A link is only left out if it is reached via links at least as eager as itself,
+        e.g. an eager import is kept if the other path to its module has a typing import.
+        So every module still reaches the same modules via import links, of each kind or more eager ones.
+    """
+    module_nodes = _module_nodes(g)
+    import_links = [(src,dst,kind) for src,dst,kind,_ in g.links["import"] if src in module_nodes and dst in module_nodes]
+    # (src, dst, kind) of the kept links, each kind reduced with the links of that kind and the more eager ones
+    kept: Set[Tuple[int, int, int]] = set()
+    for kind in sorted({kind for _,_,kind in import_links}):
+        reduced = transitive_reduction(sorted(module_nodes), [(src,dst) for src,dst,k in import_links if k <= kind])
+        kept.update((src, dst, kind) for src,dst in reduced)
+
+    def keep_link(link_type: str, link: Link) -> bool:
+        src, dst, kind = link[0], link[1], link[2]
+        return link_type != "import" or (src, dst, kind) in kept or not (src in module_nodes and dst in module_nodes)
+    return g.subgraph(keep_link=keep_link)
+
+
+def bundle_imports(g: CompactGraph) -> CompactGraph:
+    """ Returns a graph with the import links between modules in different directories bundled into one link
+        between the directories, with the number of bundled links as its '_weight' and the most eager kind of them.
+        A collapsed directory is the directory of itself. Links between modules in the same directory are kept.
+    """
+    module_nodes = _module_nodes(g)
+    collapsed = set(g.nodes_of_type("collapsed"))
+    parent: Dict[int, int] = {dst: src for src,dst,_,_ in g.links["hierarchy"]}
+
+    def directory(n: int) -> Optional[int]:
+        return n if n in collapsed else parent.get(n)
+
+    links: List[Link] = []
+    # (src dir, dst dir) -> (kind, weight), in order of first link
+    bundles: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    for src,dst,kind,weight in g.links["import"]:
+        if src in module_nodes and dst in module_nodes:
+            src_dir, dst_dir = directory(src), directory(dst)
+            if src_dir is not None and dst_dir is not None and src_dir != dst_dir:
+                bundle_kind, bundle_weight = bundles.get((src_dir, dst_dir), (kind, 0))
+                # lowest index, i.e. most eager kind
+                bundles[(src_dir, dst_dir)] = (min(bundle_kind, kind), bundle_weight + weight)
+                continue
+        links.append((src, dst, kind, weight))
+    links.extend((src_dir, dst_dir, kind, weight) for (src_dir, dst_dir),(kind, weight) in bundles.items())
+
+    attributes = {k: dict(values) for k,values in g.attributes.items()}
+    return CompactGraph(list(g.names), array("B", g.types), attributes, {"hierarchy": g.links["hierarchy"], "import": links}, **g.graph)
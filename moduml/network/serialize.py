@@ -0,0 +1,153 @@
+""" Save and load an analysed graph, to render views of a project without its source tree.
+    The graph file is JSON lines, gzipped if the filename ends with '.gz':
+        header:  {"format": "moduml-graph", "version": 1, "moduml": "0.2.0", "project_path": "proj", "nodes": 3, "links": 2}
+        nodes:   ["dir", "proj"]
+                 ["file", "proj/a.py", {"interface": [classes, functions, variables], "import_time": 120}]
+                 ["ext_package", "numpy"]
+        links:   ["hierarchy", 0, 1]
+                 ["import", 1, 2, "eager"]
+    Nodes are numbered in order, and links refer to them by number.
+"""
+from array import array
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Union
+import gzip
+import json
+
+import networkx as nx
+
+from .. import __version__
+from ..module.imports import IMPORT_KINDS
+from ..module.interface import ClassInterface, FunctionInterface, ModuleInterface
+from .compact import LINK_TYPES, NODE_TYPES, CompactGraph, Link
+
+
+GRAPH_FORMAT = "moduml-graph"
+# Bump when the layout of the records changes.
+GRAPH_FORMAT_VERSION = 1
+
+
+def _open(filepath: Union[str, Path], mode: str) -> IO[str]:
+    if Path(filepath).suffix == ".gz":
+        return gzip.open(filepath, mode + "t", encoding="utf-8")
+    return open(filepath, mode, encoding="utf-8")
+
+
+def _interface_record(module_interface: Optional[ModuleInterface]) -> Optional[List[Any]]:
+    if module_interface is None:
+        return None
+    return [[[c.name, c.bases] for c in module_interface.class_defs],
+            [[f.name, f.decorators, f.return_type] for f in module_interface.function_defs],
+            module_interface.single_assignments
+            ]
+
+
+def _module_interface(record: Optional[List[Any]]) -> Optional[ModuleInterface]:
+    if record is None:
+        return None
+    class_defs, function_defs, single_assignments = record
+    return ModuleInterface(class_defs=[ClassInterface(name=name, bases=bases) for name,bases in class_defs],
+                           function_defs=[FunctionInterface(name=name, decorators=decorators, return_type=return_type)
+                                          for name,decorators,return_type in function_defs],
+                           single_assignments=single_assignments
+                           )
+
+
+def _dumps(record: Any) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def save_graph(graph: Union[nx.DiGraph, CompactGraph], filepath: Union[str, Path]) -> None:
+    """ Write a graph made by network.create to a graph file, with the module interface and import time of files
+        and the kind of import links.
+    """
+    g = graph if isinstance(graph, CompactGraph) else CompactGraph.from_graph(graph)
+    interfaces: Dict[int, ModuleInterface] = g.attributes.get("_interface", {})
+    import_times: Dict[int, int] = g.attributes.get("_import_time", {})
+    with _open(filepath, "w") as fh:
+        fh.write(_dumps({"format": GRAPH_FORMAT,
+                         "version": GRAPH_FORMAT_VERSION,
+                         "moduml": __version__,
+                         "project_path": Path(g.graph["project_path"]).as_posix(),
+                         "nodes": len(g),
+                         "links": g.number_of_links()
+                         }))
+        for n,name in enumerate(g.names):
+            record: List[Any] = [g.node_type(n), name]
+            attributes = {}
+            if n in interfaces:
+                attributes["interface"] = _interface_record(interfaces[n])
+            if n in import_times:
+                attributes["import_time"] = import_times[n]
+            if attributes:
+                record.append(attributes)
+            fh.write(_dumps(record))
+        for link_type,links in g.links.items():
+            for src,dst,kind,weight in links:
+                record = [link_type, src, dst]
+                if link_type == "import":
+                    record.append(IMPORT_KINDS[kind])
+                if weight != 1:
+                    record.append(weight)
+                fh.write(_dumps(record))
+
+
+def load_graph(filepath: Union[str, Path]) -> CompactGraph:
+    """ Read a graph file written by save_graph, as a compact graph.
+        Raises ValueError if it isn't a graph file of a supported version, or if it is truncated or corrupt.
+    """
+    with _open(filepath, "r") as fh:
+        try:
+            header = json.loads(fh.readline())
+        except (json.JSONDecodeError, UnicodeDecodeError, OSError, EOFError):
+            header = None
+        if not isinstance(header, dict) or header.get("format") != GRAPH_FORMAT:
+            raise ValueError(f"Not a moduml graph file: '{filepath}'")
+        if header.get("version") != GRAPH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported version of graph file '{filepath}': {header.get('version')}, expected {GRAPH_FORMAT_VERSION}")
+
+        # line number in the file, for errors
+        line_number = 1
+        try:
+            n_nodes: int = header["nodes"]
+            names: List[str] = []
+            types = array("B", [0]) * n_nodes
+            interfaces: Dict[int, Optional[ModuleInterface]] = {}
+            import_times: Dict[int, int] = {}
+            for n in range(n_nodes):
+                line_number += 1
+                line = fh.readline()
+                if not line:
+                    raise ValueError(f"expected {n_nodes} nodes, found {n}")
+                record = json.loads(line)
+                types[n] = NODE_TYPES.index(record[0])
+                names.append(record[1])
+                if len(record) > 2:
+                    attributes = record[2]
+                    if "interface" in attributes:
+                        interfaces[n] = _module_interface(attributes["interface"])
+                    if "import_time" in attributes:
+                        import_times[n] = attributes["import_time"]
+
+            links: Dict[str, List[Link]] = {}
+            n_links = 0
+            for line in fh:
+                line_number += 1
+                record = json.loads(line)
+                link_type, src, dst = record[0], record[1], record[2]
+                if link_type not in LINK_TYPES or not (0 <= src < n_nodes and 0 <= dst < n_nodes):
+                    raise ValueError(f"invalid link: {line.strip()}")
+                kind = IMPORT_KINDS.index(record[3]) if link_type == "import" else 0
+                weight = record[-1] if len(record) > (4 if link_type == "import" else 3) else 1
+                links.setdefault(link_type, []).append((src, dst, kind, weight))
+                n_links += 1
+            if n_links != header["links"]:
+                raise ValueError(f"expected {header['links']} links, found {n_links}")
+        except (ValueError, IndexError, KeyError, TypeError, AttributeError, EOFError, OSError) as e:
+            # json.JSONDecodeError is a ValueError, a truncated gzip file raises EOFError
+            raise ValueError(f"Corrupt moduml graph file: '{filepath}', line {line_number}: {e}") from None
+
+    attributes = {"_interface": interfaces}
+    if import_times:
+        attributes["_import_time"] = import_times
+    return CompactGraph(names, types, attributes, links, project_path=Path(header["project_path"]))
@@ -0,0 +1,87 @@
+from argparse import Namespace
+from dataclasses import dataclass, fields
+from typing import List, Optional, Tuple, Union
+import itertools
+
+from .module.imports import IMPORT_KINDS
+
+
+# Colors of highlighted packages, in order, for those not given a color.
+HIGHLIGHT_PALETTE = ["lightskyblue1", "palegreen", "lightpink", "khaki1", "plum1", "lightsalmon", "aquamarine", "wheat"]
+
+
+def parse_highlight(highlight: Union[None, str, List[str], Tuple[str, ...]]) -> Tuple[str, ...]:
+    """ Highlight option(s) as a tuple, e.g. "numpy" --> ("numpy",)
+    """
+    if not highlight:
+        return ()
+    if isinstance(highlight, str):
+        return (highlight,)
+    return tuple(highlight)
+
+
+def parse_import_kinds(import_kinds: Union[None, str, List[str], Tuple[str, ...]]) -> Tuple[str, ...]:
+    """ Import kinds option as a tuple, e.g. "eager,guarded" --> ("eager", "guarded"). All kinds if not given.
+    """
+    if not import_kinds:
+        return tuple(IMPORT_KINDS)
+    if isinstance(import_kinds, str):
+        import_kinds = [k.strip() for k in import_kinds.split(",") if k.strip()]
+    for kind in import_kinds:
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f"Unknown import kind: '{kind}', choose from: {', '.join(IMPORT_KINDS)}")
+    return tuple(import_kinds)
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """ How to draw a graph. Immutable, so one graph can be drawn with different options at the same time.
+        See the command line help (core.parse_args) for the meaning of each option.
+    """
+    # view
+    dir_as:                str = "node"
+    excl:                  Optional[str] = None
+    incl:                  Optional[str] = None
+    highlight:             Tuple[str, ...] = () # external packages, as 'package' or 'package=color'
+    collapse_depth:        Optional[int] = None
+    granularity:           str = "file"
+    import_kinds:          Tuple[str, ...] = tuple(IMPORT_KINDS) # import links to keep, see module.imports.IMPORT_KINDS
+    reduce_imports:        bool = False
+    bundle_imports:        bool = False
+    # layout components
+    full_filepath:         bool = False
+    show_interface:        bool = False
+    show_imports:          bool = False
+    ignore_imports:        bool = False
+    show_class_bases:      bool = False
+    show_func_return_type: bool = False
+    show_func_decorators:  bool = False
+    # styling
+    rankdir:               str = "TB"
+    nodesep:               float = 0.5
+    ranksep:               float = 0.5
+    combine_links:         bool = False
+    # metrics
+    import_metrics:        bool = False # show the import closure (and import time) of files
+    # output
+    stream:                bool = False
+
+    @classmethod
+    def from_args(cls, args: Namespace) -> "RenderOptions":
+        """ The render options among the command line args.
+        """
+        options = {f.name: getattr(args, f.name) for f in fields(cls)}
+        options["highlight"] = parse_highlight(options["highlight"])
+        options["import_kinds"] = parse_import_kinds(options["import_kinds"])
+        return cls(**options)
+
+    def highlight_colors(self) -> List[Tuple[str, str]]:
+        """ The highlighted packages with their colors, e.g. [("numpy", "lightskyblue1"), ("torch", "red")]
+            Packages without a given color get the next color of the palette.
+        """
+        colors = []
+        palette = itertools.cycle(HIGHLIGHT_PALETTE)
+        for h in parse_highlight(self.highlight):
+            package, _, color = h.partition("=")
+            colors.append((package, color or next(palette)))
+        return colors
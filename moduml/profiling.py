@@ -0,0 +1,64 @@
+""" Per-stage timing of a moduml run, for finding where the time goes on large projects.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator
+import json
+import os
+import time
+
+
+def _cpu_time() -> float:
+    """ CPU time of this process and its finished child processes (e.g. parser workers, GraphViz).
+    """
+    children = os.times()
+    return time.process_time() + children.children_user + children.children_system
+
+
+@dataclass
+class StageStats:
+    name:   str
+    wall:   float = 0.0 # seconds
+    cpu:    float = 0.0 # seconds
+    counts: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(name=self.name, wall=round(self.wall, 4), cpu=round(self.cpu, 4), counts=self.counts)
+
+
+class Profiler:
+    """ Records wall time, CPU time and counts for each stage of a run.
+        Ex:
+            with profiler.stage("parse") as stage:
+                registry.load(filepaths)
+                stage.counts["files parsed"] = registry.n_parsed
+    """
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        # a stage entered more than once accumulates its time
+        stats = self.stages.setdefault(name, StageStats(name=name))
+        wall, cpu = time.perf_counter(), _cpu_time()
+        try:
+            yield stats
+        finally:
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += _cpu_time() - cpu
+
+    def to_json(self) -> str:
+        stages = [s.to_dict() for s in self.stages.values()]
+        return json.dumps(dict(stages=stages,
+                               wall=round(sum(s.wall for s in self.stages.values()), 4),
+                               cpu=round(sum(s.cpu for s in self.stages.values()), 4)
+                               ), indent=2)
+
+    def to_table(self) -> str:
+        total_wall = sum(s.wall for s in self.stages.values()) or 1.0
+        lines = [f"{'stage':<16}{'wall s':>10}{'cpu s':>10}{'%':>6}  counts"]
+        for s in self.stages.values():
+            counts = ", ".join(f"{k}: {v}" for k,v in s.counts.items())
+            lines.append(f"{s.name:<16}{s.wall:>10.3f}{s.cpu:>10.3f}{100 * s.wall / total_wall:>6.1f}  {counts}")
+        lines.append(f"{'total':<16}{sum(s.wall for s in self.stages.values()):>10.3f}{sum(s.cpu for s in self.stages.values()):>10.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,275 @@
+""" Long running local server, that keeps the analysed graphs of projects in memory: 'moduml serve <path>...'
+    Requests (HTTP GET):
+        /render?project=src&show-imports&highlight=numpy&highlight=torch=red&format=svg
+            The view of a project, with the same options as on the command line, without the leading '--'.
+            Flags are given without a value, or as 'true' / 'false'.
+            project: path as given to serve, can be left out if only one project is served
+            format: 'dot' (default), or an image format of GraphViz, e.g. 'svg' or 'png'
+        /projects
+            The served projects, as JSON.
+    The options given to serve are the defaults of the requests.
+    A project is analysed when the server starts. On a request, the files of the project are checked (mtime and size),
+    and only the files changed since the last check are re-analysed, as in watch mode.
+"""
+from argparse import ArgumentError, ArgumentTypeError, Namespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+import urllib.parse
+
+from . import core
+from . import layout_engine
+from . import network
+from . import views
+from . import watch
+from .network import CompactGraph
+from .options import RenderOptions
+from .profiling import Profiler
+
+
+DEFAULT_PORT = 8150
+
+# Options of the render command that can't be used with serve.
+UNSUPPORTED_OPTIONS = ["output_file", "save_graph", "load_graph", "watch", "importtime", "views", "profile"]
+
+# Options of the server, i.e. not of a single request, in addition to views.ANALYSIS_OPTIONS.
+SERVER_OPTIONS = {"paths", "host", "port", "socket", "refresh_interval", "output_file"}
+
+# Query values of flags, e.g. 'show-imports' or 'show-imports=true'
+FLAG_VALUES = {"": True, "true": True, "1": True, "false": False, "0": False}
+
+# Content type of each format, others are sent as binary data.
+CONTENT_TYPES = {
+    "dot":  "text/vnd.graphviz; charset=utf-8",
+    "svg":  "image/svg+xml",
+    "png":  "image/png",
+    "pdf":  "application/pdf",
+    "json": "application/json",
+}
+
+
+class Project:
+    """ The analysed graph of a project, kept up to date with its files.
+        The graph is only changed under the lock of the project, and a render uses the compact graph
+        of the last refresh, which isn't changed, so requests can render the same project at the same time.
+    """
+    def __init__(self, path: Path, args: Namespace) -> None:
+        self.path = path
+        self.args = args
+        self.lock = threading.Lock()
+        self.analyse()
+
+    def analyse(self) -> None:
+        """ Analyse all files of the project.
+        """
+        self.net, self.registry = core.analyse(self.path, args=self.args, profiler=Profiler())
+        self.snapshot = watch.take_snapshot(self.find_files())
+        self.checked = time.monotonic()
+        self.compact = CompactGraph.from_graph(self.net)
+
+    def find_files(self) -> List[Path]:
+        return core.find_python_files(self.path, ignore=core.ignore_patterns(self.args), gitignore=self.args.gitignore)
+
+    def graph(self) -> CompactGraph:
+        """ The compact graph of the project, with the files changed since the last check re-analysed.
+            The files are checked at most once per refresh interval.
+        """
+        with self.lock:
+            if time.monotonic() - self.checked >= self.args.refresh_interval:
+                self.refresh()
+            return self.compact
+
+    def refresh(self) -> None:
+        """ Re-analyse the files changed since the last check.
+            A file that can't be parsed keeps its last analysis, as in watch mode (see ModuleRegistry.reload).
+            The snapshot of the files is only advanced once the graph is patched, and if patching fails,
+            the project is analysed again, so the graph is never left half patched.
+        """
+        snapshot = watch.take_snapshot(self.find_files())
+        added, modified, removed = watch.compare_snapshots(self.snapshot, snapshot)
+        if not (added or modified or removed):
+            self.checked = time.monotonic()
+            return
+        logging.info(f"Changes in '{self.path}': {len(added)} added, {len(modified)} modified, {len(removed)} removed")
+        try:
+            network.update(self.net,
+                           project_path=self.path,
+                           added=added,
+                           modified=modified,
+                           removed=removed,
+                           registry=self.registry
+                           )
+        except Exception:
+            logging.exception(f"Failed to update the graph of '{self.path}', analysing the project again")
+            self.analyse()
+            return
+        if self.registry.cache:
+            self.registry.cache.save()
+        self.compact = CompactGraph.from_graph(self.net)
+        self.snapshot = snapshot
+        self.checked = time.monotonic()
+
+
+def request_args(args: Namespace, query: List[Tuple[str, str]]) -> Namespace:
+    """ The args of a render request: the args of the server, updated with the options in the query.
+        Raises ValueError on an unknown or invalid option.
+    """
+    r_args = Namespace(**vars(args))
+    argv = []
+    for key,value in query:
+        dest = key.replace("-", "_")
+        if dest not in vars(args) or dest in SERVER_OPTIONS or dest in views.ANALYSIS_OPTIONS:
+            raise ValueError(f"Unknown option: '{key}'")
+        default = getattr(args, dest)
+        if isinstance(default, bool):
+            if value.lower() not in FLAG_VALUES:
+                raise ValueError(f"Option '{key}' is a flag, its value can only be one of: {', '.join(repr(v) for v in FLAG_VALUES)}")
+            setattr(r_args, dest, FLAG_VALUES[value.lower()])
+            continue
+        if isinstance(default, list):
+            # repeated options replace the ones of the server, as in views
+            setattr(r_args, dest, [])
+        argv.append(f"--{key}={value}")
+    try:
+        return core.argument_parser(exit_on_error=False).parse_args(argv, namespace=r_args)
+    except (ArgumentError, ArgumentTypeError) as e:
+        raise ValueError(str(e))
+
+
+def render(project: Project, args: Namespace, file_format: str = "dot") -> bytes:
+    """ The view of a project, as a dot string or an image made by GraphViz.
+    """
+    options = RenderOptions.from_args(args)
+    view = core.prepare_view(project.graph(), project_path=project.path, options=options)
+    dot = core.dot_string(view, project_path=project.path, options=options)
+    if file_format == "dot":
+        return dot.encode()
+    counts = core.emitted_counts(view, options)
+    engine = layout_engine.select_engine(args.engine, n_nodes=counts["nodes emitted"], n_edges=counts["edges emitted"])
+    return layout_engine.render_image_data(dot, file_format=file_format, prog=engine, timeout=args.layout_timeout)
+
+
+class ModumlServer(ThreadingHTTPServer):
+    """ HTTP server of the projects, each request is handled in its own thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, projects: Dict[str, Project], args: Namespace) -> None:
+        self.projects = projects
+        self.args = args
+        super().__init__(address, RequestHandler)
+
+    def project(self, name: Optional[str]) -> Project:
+        """ The project of a request, by its path as given to serve.
+        """
+        if name is None:
+            if len(self.projects) != 1:
+                raise ValueError(f"Give the project, one of: {', '.join(self.projects)}")
+            return next(iter(self.projects.values()))
+        project = self.projects.get(Path(name).as_posix())
+        if project is None:
+            raise ValueError(f"Unknown project: '{name}', choose from: {', '.join(self.projects)}")
+        return project
+
+
+class UnixModumlServer(ModumlServer):
+    """ Same as ModumlServer, on a Unix socket.
+    """
+    address_family = socket.AF_UNIX
+
+    def server_bind(self) -> None:
+        # HTTPServer.server_bind expects a (host, port) address
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: ModumlServer
+
+    def address_string(self) -> str:
+        # clients of a Unix socket have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def respond(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qsl(url.query, keep_blank_values=True)
+        try:
+            if url.path == "/render":
+                params = dict(query)
+                project = self.server.project(params.get("project"))
+                file_format = params.get("format", "dot")
+                args = request_args(self.server.args, [(k,v) for k,v in query if k not in ("project", "format")])
+                body = render(project, args=args, file_format=file_format)
+                content_type = CONTENT_TYPES.get(file_format, "application/octet-stream")
+            elif url.path == "/projects":
+                projects = [{"project": name, "files": len(project.snapshot)} for name,project in self.server.projects.items()]
+                body, content_type = json.dumps(projects).encode(), CONTENT_TYPES["json"]
+            else:
+                self.respond(404, f"Not found: '{url.path}', use /render or /projects\n".encode(), "text/plain; charset=utf-8")
+                return
+        except ValueError as e:
+            self.respond(400, f"{e}\n".encode(), "text/plain; charset=utf-8")
+            return
+        except layout_engine.LayoutTimeout as e:
+            self.respond(504, f"{e}\n".encode(), "text/plain; charset=utf-8")
+            return
+        except Exception as e:
+            logging.exception(f"Failed to handle request '{self.path}'")
+            self.respond(500, f"{e}\n".encode(), "text/plain; charset=utf-8")
+            return
+        self.respond(200, body, content_type)
+
+
+def make_server(projects: Dict[str, Project], args: Namespace) -> ModumlServer:
+    """ The server of the projects, listening on args.socket, or else on args.host and args.port.
+    """
+    if args.socket:
+        socket_path = Path(args.socket)
+        if socket_path.is_socket():
+            # left behind by a server that was stopped
+            socket_path.unlink()
+        return UnixModumlServer(args.socket, projects=projects, args=args)
+    return ModumlServer((args.host, args.port), projects=projects, args=args)
+
+
+def run(args: Namespace) -> None:
+    for option in UNSUPPORTED_OPTIONS:
+        if getattr(args, option):
+            raise ArgumentTypeError(f"--{option.replace('_', '-')} can't be used with serve")
+    paths = [Path(p) for p in args.paths]
+    for path in paths:
+        if not path.is_dir():
+            raise ArgumentTypeError(f"Must be a directory path: '{path}'")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    projects: Dict[str, Project] = {}
+    for path in paths:
+        start = time.perf_counter()
+        project = projects[path.as_posix()] = Project(path, args)
+        logging.info(f"Analysed '{path}': {len(project.snapshot)} files in {time.perf_counter() - start:.2f} s")
+
+    server = make_server(projects, args=args)
+    address = f"unix:{args.socket}" if args.socket else f"http://{args.host}:{server.server_port}"
+    logging.info(f"Serving {len(projects)} projects on {address}, e.g. /render?project={next(iter(projects))}&show-imports (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
@@ -0,0 +1,90 @@
+""" Config of multiple views (diagrams) of a project, rendered from a single analysis.
+    Ex. views.toml:
+        [defaults]
+        show-imports = true
+
+        [[view]]
+        name = "hierarchy"
+        output-file = "hierarchy.svg"
+        show-imports = false
+
+        [[view]]
+        name = "numpy"
+        output-file = "numpy.png"
+        highlight = ["numpy", "torch=red"]
+    A view takes the command line options, updated with the defaults and then its own options.
+"""
+from argparse import ArgumentError, ArgumentTypeError, Namespace
+from pathlib import Path
+from typing import Any, Dict, List
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    # python < 3.11
+    import tomli as tomllib
+
+from . import core
+
+
+# Options that apply to the analysis, i.e. shared by all views.
+ANALYSIS_OPTIONS = {
+    "path", "cache_dir", "no_cache", "jobs", "parser", "ignore", "no_default_ignores", "gitignore",
+    "watch", "watch_interval", "views", "profile", "profile_output", "importtime", "save_graph", "load_graph",
+}
+
+
+def _dest(key: str) -> str:
+    # option names as on the command line, e.g. 'show-imports' --> 'show_imports'
+    return key.replace("-", "_")
+
+
+def view_args(args: Namespace, defaults: Dict[str, Any], view: Dict[str, Any]) -> Namespace:
+    """ The args of a single view, parsed as on the command line, e.g. highlight = ["numpy", "torch=red"]
+        is parsed as '--highlight=numpy --highlight=torch=red'.
+        Raises ValueError on an unknown or invalid option.
+    """
+    name = view.get("name")
+    v_args = Namespace(**vars(args))
+    argv = []
+    for key,value in {**defaults, **view}.items():
+        dest = _dest(key)
+        if dest == "name":
+            continue
+        if dest not in vars(args):
+            raise ValueError(f"Unknown option in view '{name}': '{key}'")
+        if dest in ANALYSIS_OPTIONS:
+            raise ValueError(f"Option '{key}' can only be given on the command line, not per view")
+        default = getattr(args, dest)
+        if isinstance(default, bool) or isinstance(value, bool):
+            if not (isinstance(default, bool) and isinstance(value, bool)):
+                kind = "a flag, its value must be true or false" if isinstance(default, bool) else "not a flag"
+                raise ValueError(f"Invalid option in view '{name}': '{key}' is {kind}, got {value!r}")
+            setattr(v_args, dest, value)
+            continue
+        values = value if isinstance(value, list) else [value]
+        if isinstance(default, list):
+            # the options of the view replace the ones of the command line
+            setattr(v_args, dest, [])
+        elif len(values) != 1:
+            raise ValueError(f"Invalid option in view '{name}': '{key}' takes a single value, got {value!r}")
+        for v in values:
+            if not isinstance(v, (str, int, float)):
+                raise ValueError(f"Invalid option in view '{name}': '{key}' takes a string or number, got {v!r}")
+            argv.append(f"--{key}={v}")
+    try:
+        v_args = core.argument_parser(exit_on_error=False).parse_args(argv, namespace=v_args)
+    except (ArgumentError, ArgumentTypeError) as e:
+        raise ValueError(f"Invalid option in view '{name}': {e}")
+    if not v_args.output_file:
+        raise ValueError(f"View '{name}' has no 'output-file'")
+    return v_args
+
+
+def load_views(views_file: Path, args: Namespace) -> List[Namespace]:
+    """ Returns the args of each view in a views file.
+    """
+    with open(views_file, "rb") as fh:
+        config = tomllib.load(fh)
+    defaults = config.get("defaults", {})
+    return [view_args(args, defaults=defaults, view=view) for view in config.get("view", [])]
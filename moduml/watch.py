@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import logging
+import os
+import time
+
+from . import network
+from .module.registry import ModuleRegistry
+from .network import ProjectGraph
+
+
+# filepath -> (mtime, size)
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def take_snapshot(filepaths: List[Path]) -> Snapshot:
+    snapshot = {}
+    for filepath in filepaths:
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            # removed since it was discovered
+            continue
+        snapshot[filepath] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def compare_snapshots(old: Snapshot, new: Snapshot) -> Tuple[List[Path], List[Path], List[Path]]:
+    """ Returns the (added, modified, removed) files between two snapshots.
+    """
+    added = [p for p in new if p not in old]
+    modified = [p for p in new if p in old and new[p] != old[p]]
+    removed = [p for p in old if p not in new]
+    return added, modified, removed
+
+
+def watch(project_path: Path,
+          net: ProjectGraph,
+          registry: ModuleRegistry,
+          find_files: Callable[[], List[Path]],
+          on_change: Callable[[ProjectGraph], None],
+          interval: float = 1.0
+          ) -> None:
+    """ Poll the project for added, modified and removed python files, until interrupted.
+        The graph is patched in place with only the changed files re-analysed, then passed to on_change.
+    """
+    snapshot = take_snapshot(find_files())
+    logging.info(f"Watching {len(snapshot)} files in '{project_path}' (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            new_snapshot = take_snapshot(find_files())
+            added, modified, removed = compare_snapshots(snapshot, new_snapshot)
+            snapshot = new_snapshot
+            if not (added or modified or removed):
+                continue
+            logging.info(f"Changes: {len(added)} added, {len(modified)} modified, {len(removed)} removed")
+            network.update(net,
+                           project_path=project_path,
+                           added=added,
+                           modified=modified,
+                           removed=removed,
+                           registry=registry
+                           )
+            if registry.cache:
+                registry.cache.save()
+            on_change(net)
+    except KeyboardInterrupt:
+        pass
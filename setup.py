@@ -18,5 +18,6 @@ setup(
         'astroid',
         'networkx',
         'pydot',
+        'tomli; python_version < "3.11"',
     ]
 )
\ No newline at end of file
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from moduml import core
+from moduml.module.imports import IMPORT_KINDS
+from moduml.network import CompactGraph, reduce_imports
+from moduml.profiling import Profiler
+
+
+def test_lazy_path_keeps_eager_import(tmp_path):
+    # a imports b eagerly, and reaches it via c only when type checking
+    (tmp_path / "a.py").write_text("from typing import TYPE_CHECKING\nimport b\nif TYPE_CHECKING:\n    import c\n")
+    (tmp_path / "b.py").write_text("x = 1\n")
+    (tmp_path / "c.py").write_text("import b\n")
+    args = core.argument_parser().parse_args([str(tmp_path), "--no-cache"])
+    net, _ = core.analyse(tmp_path, args=args, profiler=Profiler())
+    g = reduce_imports(CompactGraph.from_graph(net))
+
+    links = {(Path(g.names[src]).name, Path(g.names[dst]).name, IMPORT_KINDS[kind]) for src,dst,kind,_ in g.links["import"]
+             if g.node_type(dst) == "file"}
+    assert links == {("a.py", "b.py", "eager"), ("a.py", "c.py", "typing"), ("c.py", "b.py", "eager")}
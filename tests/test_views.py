@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from moduml import core
+from moduml import views
+
+
+def _load(tmp_path: Path, view: str) -> list:
+    views_file = tmp_path / "views.toml"
+    views_file.write_text(f'[[view]]\nname = "v"\noutput-file = "v.svg"\n{view}\n')
+    return views.load_views(views_file, core.argument_parser().parse_args([str(tmp_path)]))
+
+
+def test_view_options_are_parsed(tmp_path):
+    [v_args] = _load(tmp_path, 'highlight = ["numpy", "torch=red"]\ncollapse-depth = 1\nimport-kinds = "eager,typing"')
+    assert v_args.highlight == ["numpy", "torch=red"]
+    assert v_args.collapse_depth == 1
+    assert v_args.import_kinds == ("eager", "typing")
+
+
+def test_invalid_choice(tmp_path):
+    with pytest.raises(ValueError, match="invalid choice: 'bogus'"):
+        _load(tmp_path, 'dir-as = "bogus"')
+
+
+def test_wrong_type(tmp_path):
+    with pytest.raises(ValueError, match="invalid int value: 'two'"):
+        _load(tmp_path, 'collapse-depth = "two"')
+    with pytest.raises(ValueError, match="'show-imports' is a flag"):
+        _load(tmp_path, 'show-imports = "yes"')